@@ -6,7 +6,9 @@ from alembic import context
 from sqlalchemy import engine_from_config, pool
 
 from models import Base
+import app.models.idempotency  # noqa: F401
 import app.models.rbac  # noqa: F401
+import app.models.tenant_counters  # noqa: F401
 
 config = context.config
 
@@ -68,6 +70,9 @@ def run_migrations_online() -> None:
             connection=connection,
             target_metadata=target_metadata,
             compare_type=True,
+            # migration_helpers commits mid-revision (CONCURRENTLY, chunked
+            # backfills); keep each revision in its own transaction.
+            transaction_per_migration=True,
         )
 
         with context.begin_transaction():
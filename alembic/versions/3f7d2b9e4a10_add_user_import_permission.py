@@ -0,0 +1,25 @@
+"""add user import permission
+
+Revision ID: 3f7d2b9e4a10
+Revises: 8b9a2c0d1e7f
+Create Date: 2026-10-19 00:19:00.000000
+
+"""
+
+from migration_helpers import add_permission, remove_permission
+
+# revision identifiers, used by Alembic.
+revision = "3f7d2b9e4a10"
+down_revision = "8b9a2c0d1e7f"
+branch_labels = None
+depends_on = None
+
+PERMISSION_CODE = "erp:users:import"
+
+
+def upgrade() -> None:
+    add_permission(PERMISSION_CODE, "Bulk import users")
+
+
+def downgrade() -> None:
+    remove_permission(PERMISSION_CODE)
@@ -0,0 +1,25 @@
+"""add user directory permission
+
+Revision ID: 5d90a7c3e1f8
+Revises: e2b8f4c61a03
+Create Date: 2026-10-19 00:31:00.000000
+
+"""
+
+from migration_helpers import add_permission, remove_permission
+
+# revision identifiers, used by Alembic.
+revision = "5d90a7c3e1f8"
+down_revision = "e2b8f4c61a03"
+branch_labels = None
+depends_on = None
+
+PERMISSION_CODE = "erp:users:read"
+
+
+def upgrade() -> None:
+    add_permission(PERMISSION_CODE, "Search the user directory")
+
+
+def downgrade() -> None:
+    remove_permission(PERMISSION_CODE)
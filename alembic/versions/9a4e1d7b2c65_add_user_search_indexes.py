@@ -0,0 +1,91 @@
+"""add user search indexes
+
+Revision ID: 9a4e1d7b2c65
+Revises: 5d90a7c3e1f8
+Create Date: 2026-10-19 00:31:30.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+from migration_helpers import create_index_concurrently, drop_index_concurrently
+
+# revision identifiers, used by Alembic.
+revision = "9a4e1d7b2c65"
+down_revision = "5d90a7c3e1f8"
+branch_labels = None
+depends_on = None
+
+TENANT_EMAIL_INDEX = "ix_users_tenant_email_normalized"
+TRGM_INDEX = "ix_users_tenant_search_trgm"
+# Must match app.services.user_search so the planner can use the index.
+SEARCH_EXPRESSION = "lower(full_name || ' ' || email)"
+
+SQLITE_FTS_STATEMENTS = [
+    """
+    CREATE VIRTUAL TABLE users_fts USING fts5(
+        full_name,
+        email,
+        user_id UNINDEXED,
+        tenant_id,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER users_fts_ai AFTER INSERT ON users BEGIN
+        INSERT INTO users_fts (full_name, email, user_id, tenant_id)
+        VALUES (new.full_name, new.email, new.id, new.tenant_id);
+    END
+    """,
+    """
+    CREATE TRIGGER users_fts_ad AFTER DELETE ON users BEGIN
+        DELETE FROM users_fts WHERE user_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER users_fts_au AFTER UPDATE OF full_name, email, tenant_id ON users
+    BEGIN
+        DELETE FROM users_fts WHERE user_id = old.id;
+        INSERT INTO users_fts (full_name, email, user_id, tenant_id)
+        VALUES (new.full_name, new.email, new.id, new.tenant_id);
+    END
+    """,
+    """
+    INSERT INTO users_fts (full_name, email, user_id, tenant_id)
+    SELECT full_name, email, id, tenant_id FROM users
+    """,
+]
+
+
+def upgrade() -> None:
+    create_index_concurrently(
+        TENANT_EMAIL_INDEX, "users", ["tenant_id", "email_normalized"]
+    )
+
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        # btree_gin lets tenant_id live in the same GIN index as the trigrams.
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+        create_index_concurrently(
+            TRGM_INDEX,
+            "users",
+            ["tenant_id", sa.text(f"({SEARCH_EXPRESSION}) gin_trgm_ops")],
+            postgresql_using="gin",
+        )
+    elif dialect == "sqlite":
+        for statement in SQLITE_FTS_STATEMENTS:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        drop_index_concurrently(TRGM_INDEX, "users")
+    elif dialect == "sqlite":
+        for trigger in ("users_fts_ai", "users_fts_ad", "users_fts_au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS users_fts")
+    drop_index_concurrently(TENANT_EMAIL_INDEX, "users")
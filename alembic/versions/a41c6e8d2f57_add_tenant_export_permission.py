@@ -0,0 +1,25 @@
+"""add tenant export permission
+
+Revision ID: a41c6e8d2f57
+Revises: 3f7d2b9e4a10
+Create Date: 2026-10-19 00:20:00.000000
+
+"""
+
+from migration_helpers import add_permission, remove_permission
+
+# revision identifiers, used by Alembic.
+revision = "a41c6e8d2f57"
+down_revision = "3f7d2b9e4a10"
+branch_labels = None
+depends_on = None
+
+PERMISSION_CODE = "erp:tenant:export"
+
+
+def upgrade() -> None:
+    add_permission(PERMISSION_CODE, "Export tenant users and RBAC data")
+
+
+def downgrade() -> None:
+    remove_permission(PERMISSION_CODE)
@@ -0,0 +1,86 @@
+"""add tenant counters
+
+Revision ID: b6f0d3a81c29
+Revises: 9a4e1d7b2c65
+Create Date: 2026-10-19 00:34:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "b6f0d3a81c29"
+down_revision = "9a4e1d7b2c65"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tenant_counters",
+        sa.Column("tenant_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("user_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("role_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("user_role_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "role_permission_count", sa.Integer(), nullable=False, server_default="0"
+        ),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+        sa.PrimaryKeyConstraint("tenant_id"),
+    )
+
+    tenants = sa.table("tenants", sa.column("id"))
+    users = sa.table("users", sa.column("tenant_id"))
+    roles = sa.table("roles", sa.column("id"), sa.column("tenant_id"))
+    user_roles = sa.table("user_roles", sa.column("role_id"))
+    role_permissions = sa.table("role_permissions", sa.column("role_id"))
+    tenant_counters = sa.table(
+        "tenant_counters",
+        sa.column("tenant_id"),
+        sa.column("user_count"),
+        sa.column("role_count"),
+        sa.column("user_role_count"),
+        sa.column("role_permission_count"),
+        sa.column("updated_at"),
+    )
+
+    def _count(stmt: sa.Select) -> sa.ScalarSelect:
+        return stmt.with_only_columns(sa.func.count()).scalar_subquery()
+
+    # Tenants created by the previous release between this backfill and the deploy
+    # get their row from a recount on first dashboard read.
+    op.execute(
+        tenant_counters.insert().from_select(
+            [
+                "tenant_id",
+                "user_count",
+                "role_count",
+                "user_role_count",
+                "role_permission_count",
+                "updated_at",
+            ],
+            sa.select(
+                tenants.c.id,
+                _count(sa.select(users).where(users.c.tenant_id == tenants.c.id)),
+                _count(sa.select(roles).where(roles.c.tenant_id == tenants.c.id)),
+                _count(
+                    sa.select(user_roles)
+                    .join(roles, roles.c.id == user_roles.c.role_id)
+                    .where(roles.c.tenant_id == tenants.c.id)
+                ),
+                _count(
+                    sa.select(role_permissions)
+                    .join(roles, roles.c.id == role_permissions.c.role_id)
+                    .where(roles.c.tenant_id == tenants.c.id)
+                ),
+                sa.func.current_timestamp(),
+            ),
+        )
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("tenant_counters")
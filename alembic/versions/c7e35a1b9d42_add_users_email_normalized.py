@@ -0,0 +1,51 @@
+"""add users.email_normalized
+
+Revision ID: c7e35a1b9d42
+Revises: a41c6e8d2f57
+Create Date: 2026-10-19 00:21:30.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from migration_helpers import (
+    create_index_concurrently,
+    drop_index_concurrently,
+    run_chunked_backfill,
+)
+
+# revision identifiers, used by Alembic.
+revision = "c7e35a1b9d42"
+down_revision = "a41c6e8d2f57"
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = "ix_users_email_normalized"
+
+users_table = sa.table(
+    "users",
+    sa.column("id", postgresql.UUID(as_uuid=True)),
+    sa.column("email", sa.String),
+    sa.column("email_normalized", sa.String),
+)
+
+
+def upgrade() -> None:
+    # Nullable with no default: a metadata-only change, no table rewrite.
+    op.add_column(
+        "users", sa.Column("email_normalized", sa.String(length=255), nullable=True)
+    )
+    run_chunked_backfill(
+        users_table,
+        key=users_table.c.id,
+        values={"email_normalized": sa.func.lower(users_table.c.email)},
+        pending=users_table.c.email_normalized.is_(None),
+    )
+    create_index_concurrently(INDEX_NAME, "users", ["email_normalized"])
+
+
+def downgrade() -> None:
+    drop_index_concurrently(INDEX_NAME, "users")
+    op.drop_column("users", "email_normalized")
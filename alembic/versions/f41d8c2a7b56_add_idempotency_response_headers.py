@@ -0,0 +1,27 @@
+"""add idempotency response headers
+
+Revision ID: f41d8c2a7b56
+Revises: b6f0d3a81c29
+Create Date: 2026-10-19 01:15:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "f41d8c2a7b56"
+down_revision = "b6f0d3a81c29"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Nullable: rows stored before this replay with their media type only.
+    op.add_column(
+        "idempotency_keys", sa.Column("response_headers", sa.Text(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("idempotency_keys", "response_headers")
@@ -0,0 +1,25 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from models import Base
+
+
+class TenantCounters(Base):
+    __tablename__ = "tenant_counters"
+
+    tenant_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("tenants.id"), primary_key=True
+    )
+    user_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    role_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    user_role_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    role_permission_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=datetime.utcnow
+    )
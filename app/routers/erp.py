@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.schemas.erp import DashboardSummary
+from app.security.rbac import require_permissions
+from app.services.tenant_counters import get_tenant_counters
+from app.services.threadpool import ThreadLimitedAPIRoute
+from db import get_db
+from models import User
+
+router = APIRouter(prefix="/erp", tags=["erp"], route_class=ThreadLimitedAPIRoute)
+
+
+@router.get("/dashboard", response_model=DashboardSummary)
+def dashboard(
+    user: User = Depends(require_permissions("erp:dashboard:read")),
+    db: Session = Depends(get_db),
+) -> DashboardSummary:
+    counters = get_tenant_counters(db, user.tenant_id)
+    return DashboardSummary(
+        tenant_id=str(user.tenant_id),
+        users=counters.user_count,
+        roles=counters.role_count,
+        role_assignments=counters.user_role_count,
+        role_permissions=counters.role_permission_count,
+        updated_at=counters.updated_at,
+    )
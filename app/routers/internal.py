@@ -0,0 +1,114 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.security.internal import require_internal_token
+from app.services.admission import PRIORITIES
+from app.services.password_hashing import password_hashing_profile
+from app.services.tenant_counters import reconcile_tenant_counters
+from app.services.tracing import TracedAPIRoute
+from app.services.worker_stats import read_worker_stats
+from db import get_db
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["internal"],
+    route_class=TracedAPIRoute,
+    dependencies=[Depends(require_internal_token)],
+    include_in_schema=False,
+)
+
+_SUMMED_GROUP_FIELDS = ("capacity", "active", "waiting", "acquired", "rejected")
+
+
+@router.get("/workers")
+def workers() -> dict:
+    stats = read_worker_stats()
+    return {
+        "workers": stats,
+        "totals": {
+            "workers": len(stats),
+            "requests": sum(worker["requests"] for worker in stats),
+            "in_flight": sum(worker["in_flight"] for worker in stats),
+            "errors": sum(worker["errors"] for worker in stats),
+        },
+    }
+
+
+@router.get("/threadpool")
+def threadpool() -> dict:
+    stats = read_worker_stats()
+    totals: dict[str, dict] = {}
+    for worker in stats:
+        for name, group in worker.get("threadpool", {}).get("groups", {}).items():
+            total = totals.setdefault(
+                name, dict.fromkeys(_SUMMED_GROUP_FIELDS, 0) | {"max_wait_ms": 0.0}
+            )
+            for key in _SUMMED_GROUP_FIELDS:
+                total[key] += group[key]
+            total["max_wait_ms"] = max(total["max_wait_ms"], group["max_wait_ms"])
+            total["wait_ms"] = total.get("wait_ms", 0.0) + (
+                group["avg_wait_ms"] * group["acquired"]
+            )
+    for total in totals.values():
+        wait_ms = total.pop("wait_ms", 0.0)
+        total["avg_wait_ms"] = wait_ms / total["acquired"] if total["acquired"] else 0.0
+    return {
+        "workers": [
+            {"pid": worker["pid"], **worker.get("threadpool", {})} for worker in stats
+        ],
+        "totals": totals,
+    }
+
+
+@router.get("/admission")
+def admission() -> dict:
+    stats = read_worker_stats()
+    controllers = [worker.get("admission", {}) for worker in stats]
+    return {
+        "workers": [
+            {"pid": worker["pid"], **controller}
+            for worker, controller in zip(stats, controllers)
+        ],
+        "totals": {
+            "limit": sum(controller.get("limit", 0) for controller in controllers),
+            **{
+                key: {
+                    priority: sum(
+                        controller.get(key, {}).get(priority, 0)
+                        for controller in controllers
+                    )
+                    for priority in PRIORITIES
+                }
+                for key in ("in_flight", "admitted", "rejected")
+            },
+        },
+    }
+
+
+@router.get("/password-hashing")
+def password_hashing() -> dict:
+    return {
+        "profile": password_hashing_profile(),
+        "workers": [
+            {"pid": worker["pid"], **worker.get("password_hashing", {})}
+            for worker in read_worker_stats()
+        ],
+    }
+
+
+@router.get("/statements")
+def statements() -> dict:
+    totals: dict[str, dict] = {}
+    for worker in read_worker_stats():
+        for name, counts in worker.get("statements", {}).items():
+            total = totals.setdefault(name, {"hits": 0, "misses": 0})
+            total["hits"] += counts["hits"]
+            total["misses"] += counts["misses"]
+    for total in totals.values():
+        total["hit_rate"] = total["hits"] / (total["hits"] + total["misses"])
+    return {"statements": totals}
+
+
+@router.post("/tenant-counters/reconcile")
+def reconcile_counters(db: Session = Depends(get_db)) -> dict:
+    return {"corrected": reconcile_tenant_counters(db)}
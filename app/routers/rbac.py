@@ -4,8 +4,10 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.models.rbac import Permission, Role
+from app.models.rbac import Role
 from app.schemas.rbac import (
+    PermissionCheckRequest,
+    PermissionCheckResponse,
     PermissionOut,
     RbacMeResponse,
     RoleOut,
@@ -13,12 +15,24 @@ from app.schemas.rbac import (
     RolePermissionsUpdateResponse,
 )
 from app.security.auth import get_current_user
-from app.security.rbac import get_user_permission_codes, require_permissions
+from app.security.rbac import (
+    MissingPermissionsError,
+    evaluate_permissions,
+    get_permission_codes_by_user,
+    get_user_permission_codes,
+    require_permissions,
+)
+from app.services.idempotency import IdempotentAPIRoute, idempotent
+from app.services.permission_catalog import get_permission_catalog
 from app.services.rbac_service import update_role_permissions
+from app.services.statements import tenant_roles
 from db import get_db
 from models import User
 
-router = APIRouter(prefix="/rbac", tags=["rbac"])
+# Checking anyone other than yourself is an admin capability.
+CHECK_OTHER_USERS_PERMISSION = "rbac:users:assign_roles"
+
+router = APIRouter(prefix="/rbac", tags=["rbac"], route_class=IdempotentAPIRoute)
 
 
 @router.get("/me", response_model=RbacMeResponse)
@@ -34,14 +48,43 @@ def rbac_me(
     )
 
 
+@router.post("/check", response_model=PermissionCheckResponse)
+def check_permissions(
+    payload: PermissionCheckRequest,
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> PermissionCheckResponse:
+    required = list(dict.fromkeys(code.strip() for code in payload.permission_codes))
+    user_ids = list(dict.fromkeys([user.id, *payload.user_ids]))
+
+    granted = get_permission_codes_by_user(db, user.tenant_id, user_ids)
+    if len(user_ids) > 1 and CHECK_OTHER_USERS_PERMISSION not in granted.get(
+        user.id, set()
+    ):
+        raise MissingPermissionsError([CHECK_OTHER_USERS_PERMISSION])
+
+    unknown = [str(user_id) for user_id in user_ids if user_id not in granted]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Users not found: {', '.join(unknown)}",
+        )
+
+    return PermissionCheckResponse(
+        results={
+            str(user_id): evaluate_permissions(granted[user_id], required)
+            for user_id in user_ids
+        }
+    )
+
+
 @router.get(
     "/permissions",
     response_model=list[PermissionOut],
     dependencies=[Depends(require_permissions("rbac:permissions:read"))],
 )
 def list_permissions(db: Session = Depends(get_db)) -> list[PermissionOut]:
-    permissions = db.scalars(select(Permission).order_by(Permission.code)).all()
-    return permissions
+    return list(get_permission_catalog(db).values())
 
 
 @router.get(
@@ -52,9 +95,7 @@ def list_roles(
     user: User = Depends(require_permissions("rbac:roles:read")),
     db: Session = Depends(get_db),
 ) -> list[RoleOut]:
-    roles = db.scalars(
-        select(Role).where(Role.tenant_id == user.tenant_id).order_by(Role.name)
-    ).all()
+    roles = db.scalars(tenant_roles(user.tenant_id)).all()
     return roles
 
 
@@ -62,6 +103,7 @@ def list_roles(
     "/roles/{role_id}/permissions",
     response_model=RolePermissionsUpdateResponse,
 )
+@idempotent
 def replace_role_permissions(
     role_id: str,
     payload: RolePermissionsUpdateRequest,
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from app.security.rbac import require_permissions
+from app.services.tenant_export import (
+    EXPORT_ENTITIES,
+    EXPORT_FORMATS,
+    stream_tenant_export,
+)
+from app.services.threadpool import ThreadLimitedAPIRoute
+from models import User
+
+router = APIRouter(prefix="/tenant", tags=["tenant"], route_class=ThreadLimitedAPIRoute)
+
+_EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+@router.get("/export")
+def export_tenant(
+    fmt: str = Query(default="ndjson", alias="format"),
+    entities: list[str] | None = Query(default=None, alias="entity"),
+    user: User = Depends(require_permissions("erp:tenant:export")),
+) -> StreamingResponse:
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unsupported format; use one of: {', '.join(sorted(EXPORT_FORMATS))}.",
+        )
+
+    selected = entities or list(EXPORT_ENTITIES)
+    unknown = [entity for entity in selected if entity not in EXPORT_ENTITIES]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown entities: {', '.join(unknown)}",
+        )
+    if fmt == "csv" and len(selected) != 1:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="CSV export requires exactly one entity parameter.",
+        )
+
+    filename = f"tenant-{user.tenant_id}-{'-'.join(selected) if fmt == 'csv' else 'export'}.{fmt}"
+    return StreamingResponse(
+        stream_tenant_export(user.tenant_id, selected, fmt),
+        media_type=_EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
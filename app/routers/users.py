@@ -0,0 +1,68 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.orm import Session
+
+from app.schemas.users import UserImportResponse, UserSearchResponse
+from app.security.rbac import require_permissions
+from app.services.threadpool import ThreadLimitedAPIRoute
+from app.services.user_import import IMPORT_FORMATS, UserImporter
+from app.services.user_search import InvalidCursorError, search_users
+from db import get_db
+from models import User
+
+router = APIRouter(prefix="/users", tags=["users"], route_class=ThreadLimitedAPIRoute)
+
+_CONTENT_TYPE_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+def _resolve_import_format(request: Request, fmt: str | None) -> str:
+    if fmt:
+        if fmt not in IMPORT_FORMATS:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Unsupported format; use one of: {', '.join(sorted(IMPORT_FORMATS))}.",
+            )
+        return fmt
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    resolved = _CONTENT_TYPE_FORMATS.get(content_type)
+    if not resolved:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Upload text/csv or application/x-ndjson, or pass ?format=.",
+        )
+    return resolved
+
+
+@router.post("/import", response_model=UserImportResponse)
+async def import_users(
+    request: Request,
+    fmt: str | None = Query(default=None, alias="format"),
+    user: User = Depends(require_permissions("erp:users:import")),
+    db: Session = Depends(get_db),
+) -> UserImportResponse:
+    resolved = _resolve_import_format(request, fmt)
+    importer = UserImporter(db, user.tenant_id)
+    return await importer.run(request.stream(), resolved)
+
+
+@router.get("/search", response_model=UserSearchResponse)
+def search_user_directory(
+    # At least one non-space character: a blank query would match everyone.
+    q: str = Query(..., min_length=1, max_length=255, pattern=r"\S"),
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = Query(default=None),
+    user: User = Depends(require_permissions("erp:users:read")),
+    db: Session = Depends(get_db),
+) -> UserSearchResponse:
+    try:
+        hits, next_cursor = search_users(db, user.tenant_id, q, limit, cursor)
+    except InvalidCursorError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(exc),
+        ) from exc
+    return UserSearchResponse(results=hits, next_cursor=next_cursor)
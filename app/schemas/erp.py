@@ -0,0 +1,12 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class DashboardSummary(BaseModel):
+    tenant_id: str
+    users: int
+    roles: int
+    role_assignments: int
+    role_permissions: int
+    updated_at: datetime | None = None
@@ -35,3 +35,13 @@ class RolePermissionsUpdateRequest(BaseModel):
 class RolePermissionsUpdateResponse(BaseModel):
     role_id: str
     permission_codes: list[str]
+
+
+class PermissionCheckRequest(BaseModel):
+    permission_codes: list[str] = Field(..., min_length=1, max_length=1000)
+    user_ids: list[uuid.UUID] = Field(default_factory=list, max_length=200)
+
+
+class PermissionCheckResponse(BaseModel):
+    # user_id -> permission code -> allowed
+    results: dict[str, dict[str, bool]]
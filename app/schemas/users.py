@@ -0,0 +1,49 @@
+from datetime import datetime
+import uuid
+
+from pydantic import BaseModel, EmailStr, Field, field_validator
+
+
+class UserImportRow(BaseModel):
+    full_name: str = Field(..., min_length=1, max_length=255)
+    email: EmailStr
+    password: str = Field(..., min_length=8, max_length=128)
+    roles: list[str] = Field(default_factory=list)
+
+    @field_validator("roles", mode="before")
+    @classmethod
+    def split_roles(cls, value: object) -> object:
+        # CSV uploads carry roles as a single "Manager;Staff" cell.
+        if value is None:
+            return []
+        if isinstance(value, str):
+            return [name.strip() for name in value.split(";") if name.strip()]
+        return value
+
+
+class UserImportRowError(BaseModel):
+    line: int
+    email: str | None = None
+    errors: list[str]
+
+
+class UserImportResponse(BaseModel):
+    processed: int
+    created: int
+    failed: int
+    batches: int
+    errors: list[UserImportRowError]
+    errors_truncated: bool = False
+
+
+class UserSearchHit(BaseModel):
+    id: uuid.UUID
+    full_name: str
+    email: str
+    created_at: datetime | None = None
+    rank: float
+
+
+class UserSearchResponse(BaseModel):
+    results: list[UserSearchHit]
+    next_cursor: str | None = None
@@ -5,6 +5,7 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 
+from app.services.tracing import start_span
 from db import get_db
 from models import User
 from security import JWT_ALGORITHM, _get_jwt_secret
@@ -16,14 +17,33 @@ def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(http_bearer),
     db: Session = Depends(get_db),
 ) -> User:
-    token = credentials.credentials
-    try:
-        payload = jwt.decode(token, _get_jwt_secret(), algorithms=[JWT_ALGORITHM])
-    except JWTError as exc:
+    with start_span("auth.get_current_user"):
+        return _resolve_current_user(credentials.credentials, db)
+
+
+def resolve_authorization(authorization: str, db: Session) -> User:
+    """
+    The user behind a raw Authorization header, checked the same way as
+    get_current_user; for code that runs before dependencies are resolved.
+    """
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token.",
-        ) from exc
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid authentication credentials",
+        )
+    return _resolve_current_user(token.strip(), db)
+
+
+def _resolve_current_user(token: str, db: Session) -> User:
+    with start_span("auth.jwt_decode"):
+        try:
+            payload = jwt.decode(token, _get_jwt_secret(), algorithms=[JWT_ALGORITHM])
+        except JWTError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired token.",
+            ) from exc
 
     subject = payload.get("sub")
     if not subject:
@@ -40,7 +60,8 @@ def get_current_user(
             detail="Invalid token subject.",
         ) from exc
 
-    user = db.get(User, user_id)
+    with start_span("auth.load_user", **{"user.id": subject}):
+        user = db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
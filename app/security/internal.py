@@ -0,0 +1,21 @@
+import hmac
+import os
+
+from fastapi import Header, HTTPException, status
+
+
+def require_internal_token(
+    x_internal_token: str | None = Header(default=None),
+) -> None:
+    """
+    Guard for operational endpoints. Disabled (404) unless INTERNAL_METRICS_TOKEN
+    is set, and then the caller must send it as X-Internal-Token.
+    """
+    expected = os.getenv("INTERNAL_METRICS_TOKEN", "")
+    if not expected:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_internal_token or not hmac.compare_digest(x_internal_token, expected):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid internal token.",
+        )
@@ -1,11 +1,11 @@
 import uuid
 
 from fastapi import Depends
-from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.models.rbac import Permission, Role, RolePermission, UserRole
 from app.security.auth import get_current_user
+from app.services.statements import permission_codes_by_user, user_permission_codes
+from app.services.tracing import start_span
 from db import get_db
 from models import User
 
@@ -17,15 +17,31 @@ class MissingPermissionsError(Exception):
 
 
 def get_user_permission_codes(db: Session, user_id: uuid.UUID) -> list[str]:
-    stmt = (
-        select(Permission.code)
-        .join(RolePermission, Permission.id == RolePermission.permission_id)
-        .join(Role, Role.id == RolePermission.role_id)
-        .join(UserRole, UserRole.role_id == Role.id)
-        .where(UserRole.user_id == user_id)
-    )
-    codes = db.scalars(stmt).all()
-    return sorted(set(codes))
+    with start_span("rbac.get_user_permission_codes", **{"user.id": str(user_id)}):
+        codes = db.scalars(user_permission_codes(user_id)).all()
+        return sorted(set(codes))
+
+
+def get_permission_codes_by_user(
+    db: Session, tenant_id: uuid.UUID, user_ids: list[uuid.UUID]
+) -> dict[uuid.UUID, set[str]]:
+    """
+    Permission codes for several users of one tenant in a single query. Users that
+    don't exist in the tenant are absent from the result.
+    """
+    stmt = permission_codes_by_user(tenant_id, list(user_ids))
+    with start_span("rbac.get_permission_codes_by_user", **{"users": len(user_ids)}):
+        granted: dict[uuid.UUID, set[str]] = {}
+        for user_id, code in db.execute(stmt):
+            codes = granted.setdefault(user_id, set())
+            if code is not None:
+                codes.add(code)
+        return granted
+
+
+def evaluate_permissions(granted: set[str], required: list[str]) -> dict[str, bool]:
+    """The single allow/deny rule shared by require_permissions and /rbac/check."""
+    return {code: code in granted for code in required}
 
 
 def require_permissions(*codes: str):
@@ -38,10 +54,14 @@ def require_permissions(*codes: str):
         if not required:
             return user
 
-        user_codes = get_user_permission_codes(db, user.id)
-        missing = [code for code in required if code not in user_codes]
+        decisions = evaluate_permissions(
+            set(get_user_permission_codes(db, user.id)), required
+        )
+        missing = [code for code, allowed in decisions.items() if not allowed]
         if missing:
             raise MissingPermissionsError(missing)
         return user
 
+    # Lets IdempotentAPIRoute repeat the check before replaying a stored response.
+    _dependency._required_permissions = required
     return _dependency
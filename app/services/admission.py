@@ -0,0 +1,195 @@
+"""
+Adaptive admission control: fail fast with 503 instead of queueing without bound.
+
+Each process keeps a concurrency limit and rejects requests over it with 503 and
+Retry-After. The limit adapts (gradient style, as in Netflix's concurrency-limits):
+
+  - latency of normal-priority requests is tracked as a short and a long
+    moving average; while the short one stays within tolerance of the long one
+    the limit grows by about sqrt(limit), and when it rises the limit shrinks by the
+    ratio between them;
+  - when average DB pool checkout time goes over ADMISSION_POOL_WAIT_MS the limit
+    is cut multiplicatively, before requests back up behind the pool.
+
+Routes have priorities. Critical ones (/health, /, /internal) are never shed. Low
+priority ones (auth, bulk import, export) only get ADMISSION_LOW_PRIORITY_SHARE of
+the limit, so they are shed first and cheap reads keep their share.
+
+  ADMISSION_CONTROL               "false" disables it (default on)
+  ADMISSION_INITIAL_LIMIT         starting limit per process (default 40)
+  ADMISSION_MIN_LIMIT / _MAX_LIMIT  bounds for the limit (default 4 / 400)
+  ADMISSION_LOW_PRIORITY_SHARE    share of the limit low-priority routes may use (0.5)
+  ADMISSION_POOL_WAIT_MS          pool checkout time treated as overload (default 50)
+"""
+
+import math
+import os
+import time
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from db import pool_wait
+from settings import env_float, env_int
+
+CRITICAL = "critical"
+NORMAL = "normal"
+LOW = "low"
+PRIORITIES = (CRITICAL, NORMAL, LOW)
+
+# First matching prefix wins; anything else is NORMAL.
+ROUTE_PRIORITIES: list[tuple[str, str]] = [
+    ("/health", CRITICAL),
+    ("/internal/", CRITICAL),
+    ("/auth/", LOW),
+    ("/users/import", LOW),
+    ("/tenant/export", LOW),
+]
+
+_RETRY_AFTER_SECONDS = {NORMAL: 1, LOW: 5}
+
+# Gradient tuning: how far short-term latency may drift above the long-term baseline
+# before the limit shrinks, and how quickly a new limit replaces the old one.
+_LATENCY_TOLERANCE = 1.5
+_SMOOTHING = 0.2
+_SHORT_WINDOW = 10
+_LONG_WINDOW = 500
+_POOL_BACKOFF = 0.9
+_UPDATE_INTERVAL_SECONDS = 0.1
+
+
+def route_priority(path: str) -> str:
+    if path == "/":
+        return CRITICAL
+    for prefix, priority in ROUTE_PRIORITIES:
+        if path.startswith(prefix):
+            return priority
+    return NORMAL
+
+
+class AdmissionController:
+    def __init__(self) -> None:
+        self.enabled = os.getenv("ADMISSION_CONTROL", "true").strip().lower() not in {
+            "0",
+            "false",
+            "no",
+            "off",
+        }
+        self.min_limit = env_int("ADMISSION_MIN_LIMIT", 4, minimum=1)
+        self.max_limit = max(self.min_limit, env_int("ADMISSION_MAX_LIMIT", 400, minimum=1))
+        self.low_priority_share = min(1.0, env_float("ADMISSION_LOW_PRIORITY_SHARE", 0.5))
+        self.pool_wait_threshold = env_float("ADMISSION_POOL_WAIT_MS", 50) / 1000
+        self.reset()
+
+    def reset(self) -> None:
+        """Start from the initial limit with fresh counters (called after fork)."""
+        initial = env_int("ADMISSION_INITIAL_LIMIT", 40, minimum=1)
+        self.limit = float(min(self.max_limit, max(self.min_limit, initial)))
+        self.in_flight = dict.fromkeys(PRIORITIES, 0)
+        self.admitted = dict.fromkeys(PRIORITIES, 0)
+        self.rejected = dict.fromkeys(PRIORITIES, 0)
+        self.short_latency = 0.0
+        self.long_latency = 0.0
+        self.gradient = 1.0
+        self.pool_wait_avg = 0.0
+        self.pool_backoffs = 0
+        self._last_update = time.monotonic()
+        pool_wait.drain()
+
+    @property
+    def total_in_flight(self) -> int:
+        return self.in_flight[NORMAL] + self.in_flight[LOW]
+
+    def try_acquire(self, priority: str) -> bool:
+        if priority != CRITICAL and self.enabled:
+            limit = self.limit * (self.low_priority_share if priority == LOW else 1.0)
+            if self.total_in_flight >= max(1.0, limit):
+                self.rejected[priority] += 1
+                return False
+        self.in_flight[priority] += 1
+        self.admitted[priority] += 1
+        return True
+
+    def release(self, priority: str, latency: float) -> None:
+        self.in_flight[priority] -= 1
+        if priority == NORMAL:
+            self._record_latency(latency)
+        now = time.monotonic()
+        if now - self._last_update >= _UPDATE_INTERVAL_SECONDS:
+            self._last_update = now
+            self._update_limit()
+
+    def _record_latency(self, latency: float) -> None:
+        if not self.long_latency:
+            self.short_latency = self.long_latency = latency
+            return
+        self.short_latency += (latency - self.short_latency) / _SHORT_WINDOW
+        self.long_latency += (latency - self.long_latency) / _LONG_WINDOW
+        # After a sustained shift the old baseline is stale; let it catch up.
+        if self.long_latency / self.short_latency > 2:
+            self.long_latency *= 0.95
+
+    def _update_limit(self) -> None:
+        checkouts, total_wait, _ = pool_wait.drain()
+        if checkouts:
+            self.pool_wait_avg = total_wait / checkouts
+        if checkouts and self.pool_wait_avg > self.pool_wait_threshold:
+            self.pool_backoffs += 1
+            new_limit = self.limit * _POOL_BACKOFF
+        elif self.short_latency:
+            self.gradient = max(
+                0.5,
+                min(1.0, _LATENCY_TOLERANCE * self.long_latency / self.short_latency),
+            )
+            new_limit = self.limit * self.gradient
+            # Only grow while we're actually using the limit; an idle server says
+            # nothing about how much more it could take.
+            if self.total_in_flight >= self.limit / 2:
+                new_limit += math.sqrt(self.limit)
+            new_limit = self.limit * (1 - _SMOOTHING) + new_limit * _SMOOTHING
+        else:
+            return
+        self.limit = min(float(self.max_limit), max(float(self.min_limit), new_limit))
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "limit": round(self.limit, 2),
+            "in_flight": dict(self.in_flight),
+            "admitted": dict(self.admitted),
+            "rejected": dict(self.rejected),
+            "short_latency_ms": self.short_latency * 1000,
+            "long_latency_ms": self.long_latency * 1000,
+            "gradient": self.gradient,
+            "pool_wait_avg_ms": self.pool_wait_avg * 1000,
+            "pool_backoffs": self.pool_backoffs,
+        }
+
+
+admission_controller = AdmissionController()
+
+
+class AdmissionMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        priority = route_priority(scope["path"])
+        if not admission_controller.try_acquire(priority):
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Server is overloaded; retry shortly."},
+                headers={"Retry-After": str(_RETRY_AFTER_SECONDS[priority])},
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission_controller.release(priority, time.perf_counter() - started)
@@ -0,0 +1,343 @@
+"""
+Idempotency-Key support for retried POSTs.
+
+Mark an endpoint with @idempotent and serve it through IdempotentAPIRoute. When a
+request carries an Idempotency-Key header:
+
+  - the first request claims the key (a row in idempotency_keys) and runs the handler;
+    its response is stored for IDEMPOTENCY_TTL_SECONDS (default 24h);
+  - a replay with the same key, caller and body gets the stored response without
+    running the handler (marked with Idempotent-Replayed: true);
+  - a duplicate that arrives while the first is still running waits for it, up to
+    IDEMPOTENCY_WAIT_SECONDS, then gets 409;
+  - reusing a key with a different body is rejected with 422.
+
+Keys are scoped to method, path and the authenticated principal (tenant and user
+id), so a retry with a refreshed token still finds its key. On authenticated
+endpoints the token and the endpoint's required permissions are checked before a
+key is claimed or replayed. Anonymous endpoints (registration) are scoped to the
+request fingerprint as well, so anonymous clients never share keys. Handler errors
+and 5xx responses release the key so the client can retry.
+
+Replays carry the stored Content-Type and Location headers.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Callable
+
+from fastapi import Request, Response, status
+from fastapi.responses import JSONResponse
+from fastapi.dependencies.models import Dependant
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from app.models.idempotency import IdempotencyKey
+from app.security.auth import get_current_user, resolve_authorization
+from app.security.rbac import (
+    MissingPermissionsError,
+    evaluate_permissions,
+    get_user_permission_codes,
+)
+from app.services.leader_jobs import start_leader_job
+from app.services.threadpool import ThreadLimitedAPIRoute
+from db import SessionLocal
+from settings import env_float
+
+logger = logging.getLogger("skylynx-api")
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+# Response headers stored with the body and sent again on replay.
+STORED_HEADERS = ("content-type", "location")
+
+STATUS_IN_PROGRESS = "in_progress"
+STATUS_COMPLETED = "completed"
+
+CLAIMED = "claimed"
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+MISMATCH = "mismatch"
+
+_POLL_INTERVAL_SECONDS = 0.05
+
+
+def _ttl() -> timedelta:
+    return timedelta(seconds=env_float("IDEMPOTENCY_TTL_SECONDS", 86400))
+
+
+def _lock_timeout() -> timedelta:
+    # An in-progress claim older than this belongs to a crashed request.
+    return timedelta(seconds=env_float("IDEMPOTENCY_LOCK_SECONDS", 60))
+
+
+def _digest(*parts: bytes | str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8") if isinstance(part, str) else part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _request_fingerprint(body: bytes) -> str:
+    # Retries may re-serialise the same JSON payload differently.
+    try:
+        canonical = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":"))
+    except ValueError:
+        return _digest(body)
+    return _digest(canonical)
+
+
+def idempotent(endpoint: Callable) -> Callable:
+    endpoint._idempotent = True
+    return endpoint
+
+
+def _auth_requirements(dependant: Dependant) -> tuple[bool, list[str]]:
+    """Whether the endpoint authenticates its caller, and the permissions it requires."""
+    requires_auth = False
+    permissions: list[str] = []
+    for dependency in dependant.dependencies:
+        required = getattr(dependency.call, "_required_permissions", None)
+        if dependency.call is get_current_user or required is not None:
+            requires_auth = True
+            permissions.extend(required or [])
+        nested_auth, nested_permissions = _auth_requirements(dependency)
+        requires_auth = requires_auth or nested_auth
+        permissions.extend(nested_permissions)
+    return requires_auth, permissions
+
+
+def _principal(authorization: str, permissions: list[str]) -> str:
+    """Authenticate and authorize the caller; raises like the endpoint's dependencies."""
+    with SessionLocal() as db:
+        user = resolve_authorization(authorization, db)
+        if permissions:
+            decisions = evaluate_permissions(
+                set(get_user_permission_codes(db, user.id)), permissions
+            )
+            missing = [code for code, allowed in decisions.items() if not allowed]
+            if missing:
+                raise MissingPermissionsError(missing)
+        return f"tenant:{user.tenant_id}:user:{user.id}"
+
+
+def claim_key(
+    key: str, scope_hash: str, request_hash: str
+) -> tuple[str, IdempotencyKey | None]:
+    now = datetime.utcnow()
+    with SessionLocal() as db:
+        db.add(
+            IdempotencyKey(
+                key=key,
+                scope_hash=scope_hash,
+                request_hash=request_hash,
+                status=STATUS_IN_PROGRESS,
+                created_at=now,
+                expires_at=now + _lock_timeout(),
+            )
+        )
+        try:
+            db.commit()
+            return CLAIMED, None
+        except IntegrityError:
+            db.rollback()
+
+        record = db.scalar(
+            select(IdempotencyKey).where(
+                IdempotencyKey.key == key, IdempotencyKey.scope_hash == scope_hash
+            )
+        )
+        if record is None:
+            # Deleted between our insert and select (expired / released); try again.
+            return IN_PROGRESS, None
+        if record.expires_at.replace(tzinfo=None) <= now:
+            db.delete(record)
+            db.commit()
+            return IN_PROGRESS, None
+        if record.request_hash != request_hash:
+            return MISMATCH, record
+        if record.status == STATUS_COMPLETED:
+            db.expunge(record)
+            return COMPLETED, record
+        return IN_PROGRESS, record
+
+
+def complete_key(key: str, scope_hash: str, response: Response) -> None:
+    with SessionLocal() as db:
+        record = db.scalar(
+            select(IdempotencyKey).where(
+                IdempotencyKey.key == key, IdempotencyKey.scope_hash == scope_hash
+            )
+        )
+        if record is None:
+            return
+        record.status = STATUS_COMPLETED
+        record.response_status = response.status_code
+        record.response_body = bytes(response.body).decode("utf-8")
+        record.response_media_type = response.media_type
+        record.response_headers = json.dumps(
+            {
+                name: response.headers[name]
+                for name in STORED_HEADERS
+                if name in response.headers
+            }
+        )
+        record.expires_at = datetime.utcnow() + _ttl()
+        db.commit()
+
+
+def release_key(key: str, scope_hash: str) -> None:
+    with SessionLocal() as db:
+        db.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.key == key,
+                IdempotencyKey.scope_hash == scope_hash,
+                IdempotencyKey.status == STATUS_IN_PROGRESS,
+            )
+        )
+        db.commit()
+
+
+def purge_expired_keys(batch_size: int = 1000) -> int:
+    """Delete expired keys in small batches; returns how many were removed."""
+    removed = 0
+    with SessionLocal() as db:
+        while True:
+            ids = db.scalars(
+                select(IdempotencyKey.id)
+                .where(IdempotencyKey.expires_at <= datetime.utcnow())
+                .limit(batch_size)
+            ).all()
+            if not ids:
+                return removed
+            db.execute(delete(IdempotencyKey).where(IdempotencyKey.id.in_(ids)))
+            db.commit()
+            removed += len(ids)
+
+
+def _purge() -> None:
+    removed = purge_expired_keys()
+    if removed:
+        logger.info("Purged %s expired idempotency keys", removed)
+
+
+def start_idempotency_gc() -> None:
+    """Start the periodic purge; one worker across the deployment runs it."""
+    start_leader_job(
+        "idempotency-gc", env_float("IDEMPOTENCY_GC_INTERVAL_SECONDS", 300), _purge
+    )
+
+
+def _replay(record: IdempotencyKey) -> Response:
+    # Keys stored before response_headers existed only have the media type.
+    headers = json.loads(record.response_headers) if record.response_headers else {}
+    headers[REPLAYED_HEADER] = "true"
+    return Response(
+        content=record.response_body or "",
+        status_code=record.response_status or status.HTTP_200_OK,
+        media_type=None if "content-type" in headers else record.response_media_type,
+        headers=headers,
+    )
+
+
+# Same-process duplicates wake up as soon as the first request finishes instead of
+# waiting for the next poll.
+_local_waiters: dict[tuple[str, str], asyncio.Event] = {}
+
+
+class IdempotentAPIRoute(ThreadLimitedAPIRoute):
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        if not getattr(self.endpoint, "_idempotent", False):
+            return handler
+        requires_auth, permissions = _auth_requirements(self.dependant)
+
+        async def idempotent_handler(request: Request) -> Response:
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if not key:
+                return await handler(request)
+            if len(key) > MAX_KEY_LENGTH:
+                return JSONResponse(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    content={"detail": f"{IDEMPOTENCY_HEADER} is too long."},
+                )
+
+            body = await request.body()
+            request_hash = _request_fingerprint(body)
+            if requires_auth:
+                authorization = request.headers.get("authorization", "")
+                if not authorization:
+                    # Nothing to scope the key to; the dependencies reject the request.
+                    return await handler(request)
+                # Checked on every request, replays included, so a revoked token or
+                # permission can't keep reading stored responses until the key expires.
+                principal = await run_in_threadpool(
+                    _principal, authorization, permissions
+                )
+            else:
+                # Anonymous callers share no identity, so the request itself scopes
+                # the key; otherwise one client could collide with another's.
+                principal = f"anonymous:{request_hash}"
+            scope_hash = _digest(request.method, request.url.path, principal)
+            waiter_key = (key, scope_hash)
+            deadline = time.monotonic() + env_float("IDEMPOTENCY_WAIT_SECONDS", 10)
+
+            while True:
+                outcome, record = await run_in_threadpool(
+                    claim_key, key, scope_hash, request_hash
+                )
+                if outcome == CLAIMED:
+                    break
+                if outcome == COMPLETED:
+                    return _replay(record)
+                if outcome == MISMATCH:
+                    return JSONResponse(
+                        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        content={
+                            "detail": (
+                                f"{IDEMPOTENCY_HEADER} was already used with a "
+                                "different request."
+                            )
+                        },
+                    )
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return JSONResponse(
+                        status_code=status.HTTP_409_CONFLICT,
+                        content={
+                            "detail": "A request with this idempotency key is in progress."
+                        },
+                        headers={"Retry-After": "1"},
+                    )
+                event = _local_waiters.get(waiter_key)
+                try:
+                    if event is not None:
+                        await asyncio.wait_for(event.wait(), timeout=min(remaining, 1.0))
+                    else:
+                        await asyncio.sleep(min(remaining, _POLL_INTERVAL_SECONDS))
+                except asyncio.TimeoutError:
+                    pass
+
+            event = _local_waiters[waiter_key] = asyncio.Event()
+            try:
+                response = await handler(request)
+                if response.status_code < 500 and hasattr(response, "body"):
+                    await run_in_threadpool(complete_key, key, scope_hash, response)
+                else:
+                    await run_in_threadpool(release_key, key, scope_hash)
+                return response
+            except BaseException:
+                await run_in_threadpool(release_key, key, scope_hash)
+                raise
+            finally:
+                _local_waiters.pop(waiter_key, None)
+                event.set()
+
+        return idempotent_handler
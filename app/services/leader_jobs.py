@@ -0,0 +1,77 @@
+"""
+Periodic background jobs that must run once per deployment, not once per worker.
+
+Every worker process on every instance calls start_leader_job() at startup, but only
+the worker holding the job's PostgreSQL advisory lock runs it. The lock is a session
+lock on a connection the leader keeps open, so when that worker or its connection
+dies the lock is released and another worker takes over within one interval.
+
+On other databases (local SQLite) there is nothing shared to lock on and every
+caller runs the job; set the job's interval to 0 there to turn it off, or trigger
+it through its /internal endpoint instead.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from typing import Callable
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from db import engine
+
+logger = logging.getLogger("skylynx-api")
+
+
+def _lock_key(name: str) -> int:
+    # pg_advisory_lock takes a signed 64-bit key.
+    digest = hashlib.blake2b(f"skylynx-job:{name}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def _try_lock(conn: Connection, name: str) -> bool:
+    if conn.dialect.name != "postgresql":
+        return True
+    acquired = conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": _lock_key(name)})
+    conn.commit()
+    return bool(acquired)
+
+
+def _lead(conn: Connection, name: str, interval: float, job: Callable[[], None]) -> None:
+    logger.info("Worker is running the %s job", name)
+    while True:
+        time.sleep(interval)
+        # The lock lives and dies with this connection; if it has gone away,
+        # another worker may already have taken over.
+        conn.scalar(text("SELECT 1"))
+        conn.commit()
+        try:
+            job()
+        except Exception as exc:
+            logger.warning("%s job failed: %s", name, exc)
+
+
+def _run(name: str, interval: float, job: Callable[[], None]) -> None:
+    while True:
+        try:
+            with engine.connect() as conn:
+                try:
+                    if _try_lock(conn, name):
+                        _lead(conn, name, interval, job)
+                except Exception:
+                    # Never hand a connection that may still hold the lock back
+                    # to the pool.
+                    conn.invalidate()
+                    raise
+        except Exception as exc:
+            logger.warning("Lost the %s job lock: %s", name, exc)
+        time.sleep(interval)
+
+
+def start_leader_job(name: str, interval: float, job: Callable[[], None]) -> None:
+    """Run `job` every `interval` seconds in whichever worker holds the `name` lock."""
+    if not interval:
+        return
+    threading.Thread(target=_run, args=(name, interval, job), name=name, daemon=True).start()
@@ -0,0 +1,273 @@
+"""
+Password hashing cost, calibrated for the hardware we run on.
+
+configure_password_hashing() times the hash at startup and picks the highest cost
+whose verify fits the latency budget:
+
+  PASSWORD_HASH_SCHEME                 "bcrypt" (default) or "argon2id" (needs argon2-cffi)
+  PASSWORD_HASH_TARGET_MS              target time for one verify (default 250)
+  PASSWORD_HASH_CORES                  cores available for hashing (default: CPU count)
+  PASSWORD_HASH_MIN_LOGINS_PER_SECOND  if set, also keep the cost low enough for the
+                                       cores to sustain this many logins per second
+  PASSWORD_HASH_BCRYPT_MIN_ROUNDS      bcrypt cost floor (default 12); never lowered
+  PASSWORD_HASH_BCRYPT_MAX_ROUNDS      bcrypt cost ceiling (default 16)
+  PASSWORD_HASH_BCRYPT_ROUNDS          fixed bcrypt cost; skips calibration
+  PASSWORD_HASH_ARGON2_MEMORY_KIB      argon2id memory cost (default 65536)
+  PASSWORD_HASH_ARGON2_PARALLELISM     argon2id lanes (default 1)
+  PASSWORD_HASH_ARGON2_MIN_TIME_COST   argon2id iterations floor (default 2)
+
+Stored hashes below the chosen cost, or in another scheme, report needs_update()
+and are re-hashed after the next successful login. The chosen profile and live
+hash/verify timings are reported through /internal/password-hashing.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from passlib.context import CryptContext
+
+from app.services.tracing import start_span
+from security import check_password_length
+from settings import env_float, env_int
+
+logger = logging.getLogger("skylynx-api")
+
+CALIBRATION_PASSWORD = "calibration-password"
+
+_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+_profile: dict = {"scheme": "bcrypt", "calibrated": False}
+_configured = False
+
+
+def get_password_context() -> CryptContext:
+    return _context
+
+
+class PasswordTimings:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stats = {
+                operation: {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+                for operation in ("hash", "verify")
+            }
+            self.rehashed = 0
+
+    @contextmanager
+    def measure(self, operation: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                stats = self.stats[operation]
+                stats["count"] += 1
+                stats["total_seconds"] += elapsed
+                stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+
+    def record_rehash(self) -> None:
+        with self._lock:
+            self.rehashed += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            data = {
+                operation: {
+                    "count": stats["count"],
+                    "avg_ms": (
+                        stats["total_seconds"] / stats["count"] * 1000
+                        if stats["count"]
+                        else 0.0
+                    ),
+                    "max_ms": stats["max_seconds"] * 1000,
+                }
+                for operation, stats in self.stats.items()
+            }
+            data["rehashed"] = self.rehashed
+            return data
+
+
+password_timings = PasswordTimings()
+
+
+def _time_verify(context: CryptContext) -> float:
+    """Median seconds for one verify under `context` (hash once, verify three times)."""
+    hashed = context.hash(CALIBRATION_PASSWORD)
+    samples = []
+    for _ in range(3):
+        started = time.perf_counter()
+        context.verify(CALIBRATION_PASSWORD, hashed)
+        samples.append(time.perf_counter() - started)
+    return sorted(samples)[1]
+
+
+def _bcrypt_context(rounds: int) -> CryptContext:
+    # min_rounds makes needs_update() flag hashes made at a lower cost.
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+    )
+
+
+def _argon2_context(memory_kib: int, parallelism: int, time_cost: int) -> CryptContext:
+    # bcrypt stays verifiable but deprecated, so existing users migrate on login.
+    return CryptContext(
+        schemes=["argon2", "bcrypt"],
+        default="argon2",
+        deprecated=["bcrypt"],
+        argon2__type="ID",
+        argon2__memory_cost=memory_kib,
+        argon2__parallelism=parallelism,
+        argon2__default_rounds=time_cost,
+        argon2__min_rounds=time_cost,
+    )
+
+
+def _budget_ms(cores: int) -> float:
+    budget = env_float("PASSWORD_HASH_TARGET_MS", 250)
+    min_logins = env_float("PASSWORD_HASH_MIN_LOGINS_PER_SECOND", 0)
+    if min_logins:
+        budget = min(budget, cores * 1000 / min_logins)
+    return budget
+
+
+def _calibrate_bcrypt(budget_ms: float) -> tuple[CryptContext, dict, float]:
+    min_rounds = max(4, env_int("PASSWORD_HASH_BCRYPT_MIN_ROUNDS", 12))
+    max_rounds = min(31, max(min_rounds, env_int("PASSWORD_HASH_BCRYPT_MAX_ROUNDS", 16)))
+    fixed = env_int("PASSWORD_HASH_BCRYPT_ROUNDS", 0)
+
+    if fixed:
+        rounds = min(31, max(4, fixed))
+        context = _bcrypt_context(rounds)
+        return context, {"rounds": rounds}, _time_verify(context) * 1000
+
+    # Each extra round doubles the work, so one measurement at the floor is enough.
+    floor_ms = _time_verify(_bcrypt_context(min_rounds)) * 1000
+    extra = math.floor(math.log2(budget_ms / floor_ms)) if floor_ms < budget_ms else 0
+    rounds = min(max_rounds, min_rounds + max(0, extra))
+    if floor_ms > budget_ms:
+        logger.warning(
+            "bcrypt at the minimum cost %s takes %.0f ms, over the %.0f ms budget",
+            min_rounds,
+            floor_ms,
+            budget_ms,
+        )
+    verify_ms = floor_ms * 2 ** (rounds - min_rounds)
+    return _bcrypt_context(rounds), {"rounds": rounds}, verify_ms
+
+
+def _calibrate_argon2(budget_ms: float) -> tuple[CryptContext, dict, float]:
+    memory_kib = max(8, env_int("PASSWORD_HASH_ARGON2_MEMORY_KIB", 65536))
+    parallelism = max(1, env_int("PASSWORD_HASH_ARGON2_PARALLELISM", 1))
+    min_time_cost = max(1, env_int("PASSWORD_HASH_ARGON2_MIN_TIME_COST", 2))
+
+    # Verify time grows linearly with the number of passes.
+    floor_ms = _time_verify(_argon2_context(memory_kib, parallelism, min_time_cost)) * 1000
+    time_cost = max(min_time_cost, math.floor(min_time_cost * budget_ms / floor_ms))
+    params = {"memory_kib": memory_kib, "parallelism": parallelism, "time_cost": time_cost}
+    verify_ms = floor_ms * time_cost / min_time_cost
+    return _argon2_context(memory_kib, parallelism, time_cost), params, verify_ms
+
+
+def configure_password_hashing(force: bool = False) -> dict:
+    """Calibrate once per process tree (forked workers inherit the result)."""
+    global _context, _profile, _configured
+    if _configured and not force:
+        return _profile
+
+    cores = env_int("PASSWORD_HASH_CORES", 0) or os.cpu_count() or 1
+    budget_ms = _budget_ms(cores)
+    scheme = os.getenv("PASSWORD_HASH_SCHEME", "bcrypt").strip().lower() or "bcrypt"
+
+    if scheme in {"argon2", "argon2id"}:
+        from passlib.hash import argon2
+
+        if argon2.has_backend():
+            scheme = "argon2id"
+        else:
+            logger.warning("argon2-cffi is not installed; using bcrypt for password hashing")
+            scheme = "bcrypt"
+    elif scheme != "bcrypt":
+        logger.warning("Unknown PASSWORD_HASH_SCHEME %r; using bcrypt", scheme)
+        scheme = "bcrypt"
+
+    started = time.perf_counter()
+    if scheme == "argon2id":
+        context, params, verify_ms = _calibrate_argon2(budget_ms)
+    else:
+        context, params, verify_ms = _calibrate_bcrypt(budget_ms)
+
+    _context = context
+    _profile = {
+        "scheme": scheme,
+        "calibrated": True,
+        **params,
+        "target_ms": env_float("PASSWORD_HASH_TARGET_MS", 250),
+        "budget_ms": budget_ms,
+        "verify_ms": verify_ms,
+        "cores": cores,
+        "max_logins_per_second": cores * 1000 / verify_ms if verify_ms else None,
+        "calibration_seconds": time.perf_counter() - started,
+    }
+    _configured = True
+    logger.info(
+        "Password hashing: %s %s, verify %.0f ms (budget %.0f ms), ~%.0f logins/s on %s cores",
+        scheme,
+        params,
+        verify_ms,
+        budget_ms,
+        _profile["max_logins_per_second"] or 0,
+        cores,
+    )
+    return _profile
+
+
+def hash_password(password: str) -> str:
+    check_password_length(password)
+    with start_span("security.hash_password"), password_timings.measure("hash"):
+        return _context.hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    with start_span("security.verify_password"), password_timings.measure("verify"):
+        return _context.verify(plain_password, hashed_password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    return _context.needs_update(hashed_password)
+
+
+def password_hashing_profile() -> dict:
+    return dict(_profile)
+
+
+def password_context_settings() -> dict:
+    """The calibrated context's settings, for rebuilding it in another process."""
+    return _context.to_dict()
+
+
+_rebuilt_contexts: dict[str, CryptContext] = {}
+
+
+def hash_with_settings(settings: dict, passwords: list[str]) -> list[str]:
+    """
+    Hash under a CryptContext rebuilt from password_context_settings(). Runs in
+    the bulk-import hash processes, which start fresh rather than forking a
+    calibrated worker, so the cost comes in with every call.
+    """
+    key = repr(sorted(settings.items()))
+    context = _rebuilt_contexts.get(key)
+    if context is None:
+        context = _rebuilt_contexts[key] = CryptContext(**settings)
+    return [context.hash(password) for password in passwords]
@@ -0,0 +1,43 @@
+import threading
+from types import MappingProxyType
+from typing import Mapping
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.rbac import Permission
+from app.schemas.rbac import PermissionOut
+from db import SessionLocal
+
+# Permissions are only ever added by migrations, which run before a deploy, so the
+# catalogue is loaded once per process. server.py loads it in the master before
+# forking so every worker shares the same copy.
+_catalog: Mapping[str, PermissionOut] | None = None
+_catalog_lock = threading.Lock()
+
+
+def load_permission_catalog(db: Session) -> Mapping[str, PermissionOut]:
+    permissions = db.scalars(select(Permission).order_by(Permission.code)).all()
+    return MappingProxyType(
+        {perm.code: PermissionOut.model_validate(perm) for perm in permissions}
+    )
+
+
+def get_permission_catalog(db: Session) -> Mapping[str, PermissionOut]:
+    global _catalog
+    if _catalog is not None:
+        return _catalog
+
+    with _catalog_lock:
+        if _catalog is None:
+            catalog = load_permission_catalog(db)
+            if not catalog:
+                # Not migrated yet; don't pin an empty catalogue for the process lifetime.
+                return catalog
+            _catalog = catalog
+    return _catalog
+
+
+def preload_permission_catalog() -> int:
+    with SessionLocal() as db:
+        return len(get_permission_catalog(db))
@@ -1,7 +1,9 @@
-from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.models.rbac import Permission, Role, RolePermission, UserRole
+from app.services.permission_catalog import get_permission_catalog
+from app.services.statements import permissions_by_codes
+from app.services.tenant_counters import increment_tenant_counters
 from models import Tenant, User
 
 DEFAULT_MANAGER_PERMISSIONS = {
@@ -13,14 +15,12 @@ DEFAULT_STAFF_PERMISSIONS = {"erp:dashboard:read"}
 
 
 def create_default_roles_for_tenant(db: Session, tenant: Tenant, user: User) -> None:
-    permissions = db.scalars(select(Permission)).all()
-    if not permissions:
+    catalog = get_permission_catalog(db)
+    if not catalog:
         raise RuntimeError("No permissions found; run RBAC migrations first.")
 
-    permission_map = {perm.code: perm for perm in permissions}
-
-    missing_manager = DEFAULT_MANAGER_PERMISSIONS - set(permission_map.keys())
-    missing_staff = DEFAULT_STAFF_PERMISSIONS - set(permission_map.keys())
+    missing_manager = DEFAULT_MANAGER_PERMISSIONS - set(catalog.keys())
+    missing_staff = DEFAULT_STAFF_PERMISSIONS - set(catalog.keys())
     if missing_manager or missing_staff:
         missing = sorted(missing_manager | missing_staff)
         raise RuntimeError(f"Missing permissions: {', '.join(missing)}")
@@ -44,38 +44,59 @@ def create_default_roles_for_tenant(db: Session, tenant: Tenant, user: User) ->
     db.add_all([admin_role, manager_role, staff_role])
 
     admin_permissions = [
-        RolePermission(role=admin_role, permission=perm) for perm in permissions
+        RolePermission(role=admin_role, permission_id=perm.id)
+        for perm in catalog.values()
     ]
     manager_permissions = [
-        RolePermission(role=manager_role, permission=permission_map[code])
+        RolePermission(role=manager_role, permission_id=catalog[code].id)
         for code in sorted(DEFAULT_MANAGER_PERMISSIONS)
     ]
     staff_permissions = [
-        RolePermission(role=staff_role, permission=permission_map[code])
+        RolePermission(role=staff_role, permission_id=catalog[code].id)
         for code in sorted(DEFAULT_STAFF_PERMISSIONS)
     ]
 
-    db.add_all(admin_permissions + manager_permissions + staff_permissions)
+    role_permissions = admin_permissions + manager_permissions + staff_permissions
+    db.add_all(role_permissions)
     db.add(UserRole(user=user, role=admin_role))
+    increment_tenant_counters(
+        db,
+        tenant.id,
+        roles=3,
+        user_roles=1,
+        role_permissions=len(role_permissions),
+    )
 
 
 def update_role_permissions(
     db: Session, role: Role, permission_codes: list[str]
 ) -> list[str]:
     desired_codes = sorted({code.strip() for code in permission_codes if code.strip()})
-    if not desired_codes:
-        role.permissions = []
-        return []
-
-    permissions = db.scalars(
-        select(Permission).where(Permission.code.in_(desired_codes))
-    ).all()
-    permission_map = {perm.code: perm for perm in permissions}
-    missing = [code for code in desired_codes if code not in permission_map]
-    if missing:
-        raise ValueError(f"Unknown permission codes: {', '.join(missing)}")
+    permission_map: dict[str, Permission] = {}
+    if desired_codes:
+        permissions = db.scalars(permissions_by_codes(desired_codes)).all()
+        permission_map = {perm.code: perm for perm in permissions}
+        missing = [code for code in desired_codes if code not in permission_map]
+        if missing:
+            raise ValueError(f"Unknown permission codes: {', '.join(missing)}")
 
-    role.permissions = [
-        RolePermission(permission=permission_map[code]) for code in desired_codes
+    # Only touch the grants that change: re-adding an existing grant would be
+    # inserted before the old row is deleted and trip uq_role_permission.
+    desired_ids = {permission_map[code].id for code in desired_codes}
+    current_ids = {grant.permission_id for grant in role.permissions}
+    removed = [
+        grant for grant in role.permissions if grant.permission_id not in desired_ids
     ]
+    for grant in removed:
+        role.permissions.remove(grant)
+    added = [
+        RolePermission(permission=permission_map[code])
+        for code in desired_codes
+        if permission_map[code].id not in current_ids
+    ]
+    role.permissions.extend(added)
+
+    increment_tenant_counters(
+        db, role.tenant_id, role_permissions=len(added) - len(removed)
+    )
     return desired_codes
@@ -0,0 +1,135 @@
+"""
+Hot-path statements, built as cached lambda statements.
+
+A plain select() is rebuilt on every call, and SQLAlchemy then walks the whole
+construct to compute its cache key before it can look up the compiled SQL. A
+lambda statement is keyed on the lambda's code location instead: after the first
+call the construct is neither rebuilt nor traversed, the closure variables (email,
+user_id, ...) become bound parameters, and lists passed to in_() become expanding
+IN parameters, so every list length shares one compiled statement.
+
+Closure variables must be plain values (not ORM objects or expressions); anything
+else would be baked into the cached SQL. For the same reason execution options go
+inside the lambda: calling .execution_options() on the lambda statement itself
+returns a copy that keeps the first call's parameter values.
+
+Each statement is tagged with a `statement_name` execution option.
+instrument_statement_cache(engine) counts compiled-cache hits and misses per name;
+the counts are reported through /internal/statements.
+"""
+
+import threading
+import uuid
+
+from sqlalchemy import event, lambda_stmt, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.interfaces import CacheStats
+from sqlalchemy.sql.lambdas import StatementLambdaElement
+
+from app.models.rbac import Permission, Role, RolePermission, UserRole
+from models import User
+
+STATEMENT_NAME_OPTION = "statement_name"
+UNNAMED = "(other)"
+
+
+def user_by_email(email: str) -> StatementLambdaElement:
+    return lambda_stmt(
+        lambda: select(User)
+        .where(User.email == email)
+        .execution_options(statement_name="user_by_email")
+    )
+
+
+def users_by_email_normalized(email_normalized: str) -> StatementLambdaElement:
+    # Two rows are enough to tell a unique match from case variants of one address.
+    return lambda_stmt(
+        lambda: select(User)
+        .where(User.email_normalized == email_normalized)
+        .order_by(User.id)
+        .limit(2)
+        .execution_options(statement_name="users_by_email_normalized")
+    )
+
+
+def user_permission_codes(user_id: uuid.UUID) -> StatementLambdaElement:
+    return lambda_stmt(
+        lambda: select(Permission.code)
+        .join(RolePermission, Permission.id == RolePermission.permission_id)
+        .join(Role, Role.id == RolePermission.role_id)
+        .join(UserRole, UserRole.role_id == Role.id)
+        .where(UserRole.user_id == user_id)
+        .execution_options(statement_name="user_permission_codes")
+    )
+
+
+def permission_codes_by_user(
+    tenant_id: uuid.UUID, user_ids: list[uuid.UUID]
+) -> StatementLambdaElement:
+    return lambda_stmt(
+        lambda: select(User.id, Permission.code)
+        .outerjoin(UserRole, UserRole.user_id == User.id)
+        .outerjoin(Role, Role.id == UserRole.role_id)
+        .outerjoin(RolePermission, RolePermission.role_id == Role.id)
+        .outerjoin(Permission, Permission.id == RolePermission.permission_id)
+        .where(User.id.in_(user_ids), User.tenant_id == tenant_id)
+        .execution_options(statement_name="permission_codes_by_user")
+    )
+
+
+def tenant_roles(tenant_id: uuid.UUID) -> StatementLambdaElement:
+    return lambda_stmt(
+        lambda: select(Role)
+        .where(Role.tenant_id == tenant_id)
+        .order_by(Role.name)
+        .execution_options(statement_name="tenant_roles")
+    )
+
+
+def permissions_by_codes(codes: list[str]) -> StatementLambdaElement:
+    return lambda_stmt(
+        lambda: select(Permission)
+        .where(Permission.code.in_(codes))
+        .execution_options(statement_name="permissions_by_codes")
+    )
+
+
+class StatementCacheStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts: dict[str, dict[str, int]] = {}
+
+    def record(self, name: str, hit: bool) -> None:
+        with self._lock:
+            counts = self.counts.setdefault(name, {"hits": 0, "misses": 0})
+            counts["hits" if hit else "misses"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                name: {
+                    **counts,
+                    "hit_rate": counts["hits"] / (counts["hits"] + counts["misses"]),
+                }
+                for name, counts in sorted(self.counts.items())
+            }
+
+
+statement_cache_stats = StatementCacheStats()
+
+
+def instrument_statement_cache(engine: Engine) -> None:
+    """Count compiled-cache hits for every statement executed through `engine`."""
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        cache_hit = getattr(context, "cache_hit", None)
+        # Raw driver SQL and uncacheable constructs aren't looked up at all.
+        if cache_hit not in (CacheStats.CACHE_HIT, CacheStats.CACHE_MISS):
+            return
+        name = context.execution_options.get(STATEMENT_NAME_OPTION, UNNAMED)
+        statement_cache_stats.record(name, cache_hit == CacheStats.CACHE_HIT)
@@ -0,0 +1,197 @@
+"""
+Per-tenant counters behind the ERP dashboard.
+
+Write paths that add or remove users, roles, role assignments or role permissions
+call increment_tenant_counters() in the same transaction as the change, so a
+dashboard read is a single primary-key lookup instead of COUNT(*) over each table.
+
+reconcile_tenant_counters() recomputes the counters from the source tables in
+batches of tenants and corrects any drift (writes made by code paths that bypass
+the counters, manual SQL, rows created before the table existed). It runs every
+TENANT_COUNTERS_RECONCILE_INTERVAL_SECONDS (default 3600, 0 disables) in a single
+worker elected through app.services.leader_jobs, and can be triggered through
+/internal/tenant-counters/reconcile (e.g. from an external scheduler with the
+interval set to 0).
+"""
+
+import logging
+import uuid
+from datetime import datetime
+
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.rbac import Role, RolePermission, UserRole
+from app.models.tenant_counters import TenantCounters
+from app.services.leader_jobs import start_leader_job
+from db import SessionLocal
+from models import Tenant, User
+from settings import env_float
+
+logger = logging.getLogger("skylynx-api")
+
+COUNTER_COLUMNS = (
+    "user_count",
+    "role_count",
+    "user_role_count",
+    "role_permission_count",
+)
+
+
+def create_tenant_counters(db: Session, tenant_id: uuid.UUID) -> None:
+    """Start a new tenant's counters at zero; follow with increments for what it gets."""
+    db.add(TenantCounters(tenant_id=tenant_id, updated_at=datetime.utcnow()))
+
+
+def increment_tenant_counters(
+    db: Session,
+    tenant_id: uuid.UUID,
+    *,
+    users: int = 0,
+    roles: int = 0,
+    user_roles: int = 0,
+    role_permissions: int = 0,
+) -> None:
+    """Apply deltas in the caller's transaction.
+
+    A tenant without a counters row is left alone; the row is built by a full
+    recount on the next dashboard read or reconcile run.
+    """
+    deltas = {
+        "user_count": users,
+        "role_count": roles,
+        "user_role_count": user_roles,
+        "role_permission_count": role_permissions,
+    }
+    values = {
+        column: getattr(TenantCounters, column) + delta
+        for column, delta in deltas.items()
+        if delta
+    }
+    if not values:
+        return
+    # SessionLocal doesn't autoflush; the counters row may still be pending.
+    db.flush()
+    db.execute(
+        update(TenantCounters)
+        .where(TenantCounters.tenant_id == tenant_id)
+        .values(**values, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def count_tenant_rows(
+    db: Session, tenant_ids: list[uuid.UUID]
+) -> dict[uuid.UUID, dict[str, int]]:
+    """Actual counts for `tenant_ids`, one grouped query per table."""
+    counts = {tenant_id: dict.fromkeys(COUNTER_COLUMNS, 0) for tenant_id in tenant_ids}
+    queries = {
+        "user_count": select(User.tenant_id, func.count())
+        .where(User.tenant_id.in_(tenant_ids))
+        .group_by(User.tenant_id),
+        "role_count": select(Role.tenant_id, func.count())
+        .where(Role.tenant_id.in_(tenant_ids))
+        .group_by(Role.tenant_id),
+        "user_role_count": select(Role.tenant_id, func.count())
+        .join(UserRole, UserRole.role_id == Role.id)
+        .where(Role.tenant_id.in_(tenant_ids))
+        .group_by(Role.tenant_id),
+        "role_permission_count": select(Role.tenant_id, func.count())
+        .join(RolePermission, RolePermission.role_id == Role.id)
+        .where(Role.tenant_id.in_(tenant_ids))
+        .group_by(Role.tenant_id),
+    }
+    for column, stmt in queries.items():
+        for tenant_id, count in db.execute(stmt):
+            counts[tenant_id][column] = count
+    return counts
+
+
+def _reconcile_batch(db: Session, tenant_ids: list[uuid.UUID]) -> int:
+    # Lock the counter rows first: writers update them in the same transaction as
+    # their inserts, so once we hold the locks every committed change is visible to
+    # the counts below and every uncommitted one will still apply its delta after us.
+    existing = {
+        row.tenant_id: row
+        for row in db.scalars(
+            select(TenantCounters)
+            .where(TenantCounters.tenant_id.in_(tenant_ids))
+            .order_by(TenantCounters.tenant_id)
+            .with_for_update()
+        )
+    }
+    now = datetime.utcnow()
+    corrected = 0
+    for tenant_id, actual in count_tenant_rows(db, tenant_ids).items():
+        row = existing.get(tenant_id)
+        if row is None:
+            db.add(TenantCounters(tenant_id=tenant_id, updated_at=now, **actual))
+            corrected += 1
+            continue
+        drift = {
+            column: value
+            for column, value in actual.items()
+            if getattr(row, column) != value
+        }
+        if drift:
+            logger.info("Tenant %s counter drift corrected: %s", tenant_id, drift)
+            for column, value in drift.items():
+                setattr(row, column, value)
+            row.updated_at = now
+            corrected += 1
+    db.commit()
+    return corrected
+
+
+def reconcile_tenant_counters(
+    db: Session,
+    tenant_ids: list[uuid.UUID] | None = None,
+    batch_size: int = 500,
+) -> int:
+    """Recompute counters in tenant batches; returns how many rows were corrected."""
+    if tenant_ids is not None:
+        return sum(
+            _reconcile_batch(db, tenant_ids[start : start + batch_size])
+            for start in range(0, len(tenant_ids), batch_size)
+        )
+
+    corrected = 0
+    last_id: uuid.UUID | None = None
+    while True:
+        stmt = select(Tenant.id).order_by(Tenant.id).limit(batch_size)
+        if last_id is not None:
+            stmt = stmt.where(Tenant.id > last_id)
+        batch = db.scalars(stmt).all()
+        if not batch:
+            return corrected
+        corrected += _reconcile_batch(db, list(batch))
+        last_id = batch[-1]
+
+
+def get_tenant_counters(db: Session, tenant_id: uuid.UUID) -> TenantCounters:
+    counters = db.get(TenantCounters, tenant_id)
+    if counters is None:
+        try:
+            reconcile_tenant_counters(db, [tenant_id])
+        except IntegrityError:
+            # Another request built the row first.
+            db.rollback()
+        counters = db.get(TenantCounters, tenant_id)
+    return counters
+
+
+def _reconcile_all() -> None:
+    with SessionLocal() as db:
+        corrected = reconcile_tenant_counters(db)
+    if corrected:
+        logger.info("Reconciled counters for %s tenants", corrected)
+
+
+def start_counter_reconciler() -> None:
+    """Start the periodic reconcile; one worker across the deployment runs it."""
+    start_leader_job(
+        "tenant-counters-reconcile",
+        env_float("TENANT_COUNTERS_RECONCILE_INTERVAL_SECONDS", 3600),
+        _reconcile_all,
+    )
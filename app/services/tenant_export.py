@@ -0,0 +1,122 @@
+import csv
+import io
+import json
+import uuid
+from datetime import datetime
+from typing import Iterator
+
+from sqlalchemy import Select, select
+
+from app.models.rbac import Permission, Role, RolePermission, UserRole
+from db import SessionLocal
+from models import User
+from settings import env_int
+
+EXPORT_FORMATS = {"csv", "ndjson"}
+EXPORT_ENTITIES = ("users", "roles", "role_permissions", "user_roles")
+
+
+def _export_batch_size() -> int:
+    return env_int("TENANT_EXPORT_BATCH_SIZE", 1000, minimum=1)
+
+
+def _entity_statement(entity: str, tenant_id: uuid.UUID) -> Select:
+    # Column selects only: ORM entities would pile up in the session's identity map.
+    if entity == "users":
+        return (
+            select(User.id, User.full_name, User.email, User.created_at)
+            .where(User.tenant_id == tenant_id)
+            .order_by(User.id)
+        )
+    if entity == "roles":
+        return (
+            select(Role.id, Role.name, Role.description, Role.created_at)
+            .where(Role.tenant_id == tenant_id)
+            .order_by(Role.id)
+        )
+    if entity == "role_permissions":
+        return (
+            select(
+                RolePermission.role_id,
+                Role.name.label("role_name"),
+                Permission.code.label("permission_code"),
+            )
+            .join(Role, Role.id == RolePermission.role_id)
+            .join(Permission, Permission.id == RolePermission.permission_id)
+            .where(Role.tenant_id == tenant_id)
+            .order_by(RolePermission.role_id, Permission.code)
+        )
+    if entity == "user_roles":
+        return (
+            select(
+                UserRole.user_id,
+                User.email.label("user_email"),
+                UserRole.role_id,
+                Role.name.label("role_name"),
+            )
+            .join(User, User.id == UserRole.user_id)
+            .join(Role, Role.id == UserRole.role_id)
+            .where(Role.tenant_id == tenant_id)
+            .order_by(UserRole.user_id, UserRole.role_id)
+        )
+    raise ValueError(f"Unknown export entity: {entity}")
+
+
+def _serialize(value: object) -> object:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def stream_tenant_export(
+    tenant_id: uuid.UUID, entities: list[str], fmt: str
+) -> Iterator[str]:
+    """
+    Yield the export in chunks of one fetch batch each.
+
+    Opens its own session: request-scoped sessions from get_db are closed before a
+    streaming response body starts being sent.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    if fmt == "csv" and len(entities) != 1:
+        raise ValueError("CSV export supports exactly one entity.")
+
+    batch_size = _export_batch_size()
+    with SessionLocal() as db:
+        for entity in entities:
+            stmt = _entity_statement(entity, tenant_id).execution_options(
+                stream_results=True, yield_per=batch_size
+            )
+            result = db.execute(stmt)
+            columns = list(result.keys())
+
+            if fmt == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(columns)
+                yield buffer.getvalue()
+
+            for rows in result.partitions():
+                if fmt == "csv":
+                    buffer = io.StringIO()
+                    writer = csv.writer(buffer)
+                    writer.writerows([[_serialize(value) for value in row] for row in rows])
+                    yield buffer.getvalue()
+                else:
+                    yield "".join(
+                        json.dumps(
+                            {
+                                "type": entity,
+                                **{
+                                    column: _serialize(value)
+                                    for column, value in zip(columns, row)
+                                },
+                            }
+                        )
+                        + "\n"
+                        for row in rows
+                    )
+            result.close()
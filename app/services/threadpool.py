@@ -0,0 +1,182 @@
+"""
+Worker-thread capacity for sync endpoints.
+
+Sync handlers and their sync dependencies (get_db, get_current_user, ...) run on
+AnyIO worker threads, and a request holds its thread for the whole call; for
+/auth/login that includes the bcrypt verify. Sync routes are split into limiter
+groups so CPU-heavy auth requests can't take every thread away from DB reads:
+
+  THREADPOOL_SIZE                   AnyIO worker threads per process (default 40)
+  THREADPOOL_AUTH_LIMIT             concurrent requests in the "auth" group (default 10)
+  THREADPOOL_DB_LIMIT               concurrent requests in the "db" group (default 28)
+  THREADPOOL_QUEUE_TIMEOUT_SECONDS  how long a request waits for its group before
+                                    it is rejected with 503 (default 30, 0 = no limit)
+
+Endpoints opt into a group with @thread_group("auth"); other sync endpoints served
+by ThreadLimitedAPIRoute use "db". Keep the group limits below THREADPOOL_SIZE so
+untracked thread work (idempotency claims, streamed exports) still gets a thread.
+"""
+
+import inspect
+import logging
+import time
+from typing import Any, Callable
+
+import anyio
+import anyio.to_thread
+from fastapi import Request, Response, status
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.services.tracing import TracedAPIRoute
+from settings import env_float, env_int
+
+logger = logging.getLogger("skylynx-api")
+
+AUTH_GROUP = "auth"
+DB_GROUP = "db"
+
+_GROUP_LIMITS = {
+    AUTH_GROUP: ("THREADPOOL_AUTH_LIMIT", 10),
+    DB_GROUP: ("THREADPOOL_DB_LIMIT", 28),
+}
+
+
+def thread_group(name: str) -> Callable[[Callable], Callable]:
+    if name not in _GROUP_LIMITS:
+        raise ValueError(f"Unknown thread group: {name}")
+
+    def mark(endpoint: Callable) -> Callable:
+        endpoint._thread_group = name
+        return endpoint
+
+    return mark
+
+
+class ThreadGroup:
+    def __init__(self, name: str, capacity: int) -> None:
+        self.name = name
+        self.capacity = capacity
+        self._limiter: anyio.CapacityLimiter | None = None
+        self.acquired = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    @property
+    def limiter(self) -> anyio.CapacityLimiter:
+        # AnyIO primitives need a running event loop, so build lazily in each worker.
+        if self._limiter is None:
+            self._limiter = anyio.CapacityLimiter(self.capacity)
+        return self._limiter
+
+    def record_wait(self, seconds: float) -> None:
+        self.acquired += 1
+        self.total_wait_seconds += seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def snapshot(self) -> dict:
+        limiter = self._limiter
+        return {
+            "capacity": self.capacity,
+            "active": int(limiter.borrowed_tokens) if limiter else 0,
+            "waiting": limiter.statistics().tasks_waiting if limiter else 0,
+            "acquired": self.acquired,
+            "rejected": self.rejected,
+            "avg_wait_ms": (
+                self.total_wait_seconds / self.acquired * 1000 if self.acquired else 0.0
+            ),
+            "max_wait_ms": self.max_wait_seconds * 1000,
+        }
+
+
+thread_groups: dict[str, ThreadGroup] = {}
+
+
+def reset_thread_groups() -> None:
+    """(Re)build the groups from the environment with fresh counters."""
+    thread_groups.clear()
+    for name, (env_name, default) in _GROUP_LIMITS.items():
+        thread_groups[name] = ThreadGroup(name, env_int(env_name, default, minimum=1))
+
+
+reset_thread_groups()
+
+
+_default_limiter: anyio.CapacityLimiter | None = None
+
+
+def configure_threadpool() -> None:
+    """Size AnyIO's default thread limiter; call from the app's startup hook."""
+    global _default_limiter
+    size = env_int("THREADPOOL_SIZE", 40, minimum=1)
+    _default_limiter = anyio.to_thread.current_default_thread_limiter()
+    _default_limiter.total_tokens = size
+    grouped = sum(group.capacity for group in thread_groups.values())
+    if grouped >= size:
+        logger.warning(
+            "Thread group limits (%s) leave no spare threads out of THREADPOOL_SIZE=%s",
+            grouped,
+            size,
+        )
+
+
+def threadpool_snapshot() -> dict:
+    limiter = _default_limiter
+    return {
+        "threads": {
+            "size": int(limiter.total_tokens) if limiter else None,
+            "busy": int(limiter.borrowed_tokens) if limiter else 0,
+        },
+        "groups": {name: group.snapshot() for name, group in thread_groups.items()},
+    }
+
+
+async def run_in_thread_group(name: str, func: Callable, *args: Any) -> Any:
+    """
+    Run `func` on a worker thread once group `name` has room, as a grouped endpoint
+    would. For work that starts outside a request, such as background tasks, which
+    otherwise only count against the default thread limiter.
+    """
+    group = thread_groups[name]
+    started = time.perf_counter()
+    async with group.limiter:
+        group.record_wait(time.perf_counter() - started)
+        return await run_in_threadpool(func, *args)
+
+
+class ThreadLimitedAPIRoute(TracedAPIRoute):
+    """Runs sync endpoints only once their thread group has capacity."""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        if inspect.iscoroutinefunction(self.dependant.call):
+            return handler
+        group_name = getattr(self.endpoint, "_thread_group", DB_GROUP)
+
+        async def limited_handler(request: Request) -> Response:
+            group = thread_groups[group_name]
+            timeout = env_float("THREADPOOL_QUEUE_TIMEOUT_SECONDS", 30)
+            borrower = object()
+            acquired = False
+            started = time.perf_counter()
+            with anyio.move_on_after(timeout or None):
+                await group.limiter.acquire_on_behalf_of(borrower)
+                acquired = True
+            waited = time.perf_counter() - started
+
+            if not acquired:
+                group.rejected += 1
+                return JSONResponse(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    content={"detail": "Server is busy; retry shortly."},
+                    headers={"Retry-After": "1"},
+                )
+
+            group.record_wait(waited)
+            try:
+                return await handler(request)
+            finally:
+                group.limiter.release_on_behalf_of(borrower)
+
+        return limited_handler
@@ -0,0 +1,434 @@
+"""
+Lightweight, dependency-free request tracing.
+
+Spans are recorded per request and exported as OTLP/JSON (one ExportTraceServiceRequest
+object per line) to stdout or a file. Configuration:
+
+  TRACE_EXPORT             "stdout" or a file path; tracing is off when unset
+  TRACE_SAMPLE_RATE        head sampling probability for new traces (default 0.1)
+  TRACE_SLOW_THRESHOLD_MS  when > 0, record every request and always keep traces
+                           slower than this, regardless of the sampling decision
+  TRACE_EXPORT_QUEUE_SIZE  finished traces waiting for the exporter thread (default
+                           1000); traces arriving while it is full are dropped and
+                           counted in trace_export_stats
+
+Incoming W3C `traceparent` headers are honoured: the trace continues under the
+caller's trace ID and the caller's sampled flag wins over TRACE_SAMPLE_RATE.
+Headers from future versions are read for their first four fields, as the spec
+asks.
+"""
+
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from typing import Any, Callable
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from settings import env_float, env_int
+
+logger = logging.getLogger("skylynx-api")
+
+SERVICE_NAME = "skylynx-api"
+SCOPE_NAME = "skylynx.tracing"
+MAX_STATEMENT_LENGTH = 2000
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_ERROR = 2
+
+# version-trace_id-parent_id-flags; versions after 00 may append "-..." fields.
+_TRACEPARENT_RE = re.compile(
+    r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})(-.*)?$"
+)
+
+
+def parse_traceparent(value: str) -> tuple[str, str, bool] | None:
+    """(trace_id, parent_span_id, sampled) from a W3C traceparent, or None if invalid."""
+    match = _TRACEPARENT_RE.match(value.strip().lower())
+    if match is None:
+        return None
+    version, trace_id, parent_id, flags, rest = match.groups()
+    if version == "ff" or (version == "00" and rest is not None):
+        return None
+    if trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+class Trace:
+    __slots__ = ("trace_id", "sampled", "spans")
+
+    def __init__(self, trace_id: str, sampled: bool) -> None:
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.spans: list["Span"] = []
+
+
+class Span:
+    __slots__ = (
+        "trace",
+        "span_id",
+        "parent_span_id",
+        "name",
+        "kind",
+        "attributes",
+        "start_ns",
+        "end_ns",
+        "error",
+        "_token",
+    )
+
+    def __init__(
+        self,
+        trace: Trace,
+        name: str,
+        parent_span_id: str | None,
+        kind: int,
+        attributes: dict[str, Any],
+    ) -> None:
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error: str | None = None
+        self._token: contextvars.Token | None = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def start(self) -> "Span":
+        self.start_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def end(self, error: BaseException | None = None) -> None:
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        if self._token is not None:
+            try:
+                _current_span.reset(self._token)
+            except ValueError:
+                # Ended from a different context (e.g. SQL cursor events); the
+                # owning context's variable is left to unwind on its own.
+                pass
+            self._token = None
+        self.trace.spans.append(self)
+
+    def __enter__(self) -> "Span":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.end(exc)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def start(self) -> "_NoopSpan":
+        return self
+
+    def end(self, error: BaseException | None = None) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar(
+    "skylynx_current_span", default=None
+)
+
+
+def start_span(
+    name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any
+) -> Span | _NoopSpan:
+    """Child span of the current span, or a no-op when the request isn't traced."""
+    parent = _current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(parent.trace, name, parent.span_id, kind, attributes)
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(span: Span) -> dict:
+    data = {
+        "traceId": span.trace.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": span.kind,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [
+            {"key": key, "value": _otlp_value(value)}
+            for key, value in span.attributes.items()
+        ],
+    }
+    if span.parent_span_id:
+        data["parentSpanId"] = span.parent_span_id
+    if span.error:
+        data["status"] = {"code": STATUS_ERROR, "message": span.error}
+    return data
+
+
+def to_otlp_json(trace: Trace) -> str:
+    return json.dumps(
+        {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {"key": "service.name", "value": {"stringValue": SERVICE_NAME}},
+                            {"key": "process.pid", "value": {"intValue": str(os.getpid())}},
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": SCOPE_NAME},
+                            "spans": [_otlp_span(span) for span in trace.spans],
+                        }
+                    ],
+                }
+            ]
+        },
+        separators=(",", ":"),
+    )
+
+
+class TraceExportStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.exported = 0
+            self.dropped = 0
+
+    def record_exported(self) -> None:
+        with self._lock:
+            self.exported += 1
+
+    def record_dropped(self) -> int:
+        with self._lock:
+            self.dropped += 1
+            return self.dropped
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"exported": self.exported, "dropped": self.dropped}
+
+
+trace_export_stats = TraceExportStats()
+
+
+class TraceExporter:
+    """Writes finished traces from a background thread so requests never block on I/O."""
+
+    def __init__(self, target: str) -> None:
+        self.target = target
+        # Bounded so a stalled sink costs dropped traces rather than unbounded memory.
+        self.queue_size = env_int("TRACE_EXPORT_QUEUE_SIZE", 1000, minimum=1)
+        self._queue: queue.Queue[Trace | None] = queue.Queue(maxsize=self.queue_size)
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self._lock = threading.Lock()
+
+    def _ensure_thread(self) -> None:
+        # Threads don't survive fork; start one lazily in each worker process.
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self.queue_size)
+                self._thread = threading.Thread(
+                    target=self._run, name="trace-exporter", daemon=True
+                )
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def export(self, trace: Trace) -> None:
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            if trace_export_stats.record_dropped() == 1:
+                logger.warning(
+                    "Trace export queue is full (%s traces); dropping traces",
+                    self.queue_size,
+                )
+
+    def _run(self) -> None:
+        stream = sys.stdout if self.target == "stdout" else open(self.target, "a", buffering=1)
+        while True:
+            trace = self._queue.get()
+            if trace is None:
+                break
+            try:
+                stream.write(to_otlp_json(trace) + "\n")
+                stream.flush()
+                trace_export_stats.record_exported()
+            except Exception:
+                pass
+
+
+class TracingMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        target = os.getenv("TRACE_EXPORT", "").strip()
+        self.exporter = TraceExporter(target) if target else None
+        self.sample_rate = env_float("TRACE_SAMPLE_RATE", 0.1)
+        self.slow_threshold_ns = int(env_float("TRACE_SLOW_THRESHOLD_MS", 0) * 1_000_000)
+
+    def _incoming_context(self, scope: Scope) -> tuple[str, str | None, bool | None]:
+        for key, value in scope.get("headers", []):
+            if key == b"traceparent":
+                parent = parse_traceparent(value.decode("latin-1"))
+                if parent is not None:
+                    return parent
+                break
+        return os.urandom(16).hex(), None, None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.exporter is None:
+            await self.app(scope, receive, send)
+            return
+
+        trace_id, parent_span_id, parent_sampled = self._incoming_context(scope)
+        sampled = (
+            parent_sampled
+            if parent_sampled is not None
+            else random.random() < self.sample_rate
+        )
+        if not sampled and not self.slow_threshold_ns:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(trace_id, sampled)
+        root = Span(
+            trace,
+            f"{scope['method']} {scope['path']}",
+            parent_span_id,
+            SPAN_KIND_SERVER,
+            {"http.method": scope["method"], "http.target": scope["path"]},
+        )
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+            await send(message)
+
+        root.start()
+        error: BaseException | None = None
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            route = scope.get("route")
+            if route is not None and getattr(route, "path", None):
+                root.name = f"{scope['method']} {route.path}"
+                root.set_attribute("http.route", route.path)
+            root.end(error)
+            duration_ns = root.end_ns - root.start_ns
+            if sampled or duration_ns >= self.slow_threshold_ns:
+                root.set_attribute("trace.kept_as_slow", not sampled)
+                self.exporter.export(trace)
+
+
+class TracedAPIRoute(APIRoute):
+    """APIRoute whose endpoint body runs inside a `handler` span."""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs: Any) -> None:
+        # include_router re-creates routes from the already wrapped endpoint.
+        if getattr(endpoint, "_traced_handler", False):
+            super().__init__(path, endpoint, **kwargs)
+            return
+
+        name = f"handler {endpoint.__name__}"
+        if inspect.iscoroutinefunction(endpoint):
+
+            @functools.wraps(endpoint)
+            async def wrapped(*args, **kw):
+                with start_span(name):
+                    return await endpoint(*args, **kw)
+
+        else:
+
+            @functools.wraps(endpoint)
+            def wrapped(*args, **kw):
+                with start_span(name):
+                    return endpoint(*args, **kw)
+
+        wrapped._traced_handler = True
+        super().__init__(path, wrapped, **kwargs)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Record a client span for every SQL statement executed through `engine`."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        span = start_span(
+            "db.query",
+            SPAN_KIND_CLIENT,
+            **{
+                "db.system": engine.dialect.name,
+                "db.statement": statement[:MAX_STATEMENT_LENGTH],
+                "db.executemany": executemany,
+            },
+        )
+        if span is NOOP_SPAN:
+            return
+        conn.info.setdefault("trace_spans", []).append(span.start())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("trace_spans")
+        if spans:
+            span = spans.pop()
+            if cursor.rowcount is not None and cursor.rowcount >= 0:
+                span.set_attribute("db.rowcount", cursor.rowcount)
+            span.end()
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        spans = conn.info.get("trace_spans") if conn is not None else None
+        if spans:
+            spans.pop().end(exception_context.original_exception)
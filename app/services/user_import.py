@@ -0,0 +1,367 @@
+import asyncio
+import codecs
+import csv
+import io
+import json
+import logging
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import AsyncIterator, Iterable
+
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.models.rbac import Role, UserRole
+from app.schemas.users import UserImportResponse, UserImportRow, UserImportRowError
+from app.services.password_hashing import hash_with_settings, password_context_settings
+from app.services.tenant_counters import increment_tenant_counters
+from models import User, normalize_email, uuid7
+from security import PasswordTooLongError, check_password_length
+from settings import env_int
+
+logger = logging.getLogger("skylynx-api")
+
+IMPORT_FORMATS = {"csv", "ndjson"}
+DEFAULT_IMPORT_ROLE = "Staff"
+MAX_REPORTED_ERRORS = 1000
+
+_USER_COLUMNS = (
+    "id",
+    "tenant_id",
+    "full_name",
+    "email",
+    "email_normalized",
+    "password_hash",
+    "created_at",
+)
+_USER_ROLE_COLUMNS = ("id", "user_id", "role_id")
+
+_hash_pool: ProcessPoolExecutor | None = None
+_hash_workers = 1
+
+
+def _default_hash_workers() -> int:
+    # Every web worker gets its own pool; together they should fill the CPUs, not
+    # multiply them.
+    cpus = os.cpu_count() or 1
+    web_workers = env_int("WEB_CONCURRENCY", 0) or cpus
+    return max(1, cpus // web_workers)
+
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool, _hash_workers
+    if _hash_pool is None:
+        _hash_workers = env_int(
+            "USER_IMPORT_HASH_WORKERS", _default_hash_workers(), minimum=1
+        )
+        # Forking a threaded web worker can copy a lock another thread holds
+        # (password_timings, tracing spans) into a child that then never gets it.
+        # forkserver children fork from a clean single-threaded server instead.
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context(
+            "forkserver" if "forkserver" in methods else "spawn"
+        )
+        _hash_pool = ProcessPoolExecutor(max_workers=_hash_workers, mp_context=context)
+    return _hash_pool
+
+
+def shutdown_hash_pool() -> None:
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=False, cancel_futures=True)
+        _hash_pool = None
+
+
+async def _hash_passwords(passwords: list[str]) -> list[str]:
+    """Hash a batch of passwords across the worker processes, preserving order."""
+    pool = _get_hash_pool()
+    settings = password_context_settings()
+    size = max(1, -(-len(passwords) // _hash_workers))
+    loop = asyncio.get_running_loop()
+    chunks = await asyncio.gather(
+        *(
+            loop.run_in_executor(
+                pool, hash_with_settings, settings, passwords[i : i + size]
+            )
+            for i in range(0, len(passwords), size)
+        )
+    )
+    return [hashed for chunk in chunks for hashed in chunk]
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Yield lines without their terminator. Only "\n" ends a line (with an optional
+    "\r" before it): str.splitlines() would also split on U+2028, form feeds and
+    other characters that are legal inside JSON strings and CSV fields.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.removesuffix("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.removesuffix("\r")
+
+
+async def iter_import_records(
+    chunks: AsyncIterator[bytes], fmt: str
+) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    """
+    Yield (line, record, parse_error) tuples from an uploaded CSV or NDJSON stream
+    without holding more than one record in memory.
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+    header: list[str] | None = None
+    record = ""
+    record_line = 0
+    line_no = 0
+    async for line in _iter_lines(chunks):
+        line_no += 1
+        if fmt == "ndjson":
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield line_no, None, f"Invalid JSON: {exc.msg}"
+                continue
+            if not isinstance(data, dict):
+                yield line_no, None, "Expected a JSON object."
+                continue
+            yield line_no, data, None
+            continue
+
+        # A CSV record may span lines inside quotes; it is complete once the
+        # quotes balance out.
+        if not record:
+            record_line = line_no
+        record += line + "\n"
+        if record.count('"') % 2:
+            continue
+        text, record = record, ""
+        if not text.strip():
+            continue
+        values = next(csv.reader(io.StringIO(text)))
+        if header is None:
+            header = [name.strip().lower() for name in values]
+            continue
+        if len(values) != len(header):
+            yield record_line, None, (
+                f"Expected {len(header)} columns, got {len(values)}."
+            )
+            continue
+        yield record_line, dict(zip(header, values)), None
+
+    if record.strip():
+        yield record_line, None, "Unterminated quoted field."
+
+
+class UserImporter:
+    def __init__(self, db: Session, tenant_id: uuid.UUID) -> None:
+        self.db = db
+        self.tenant_id = tenant_id
+        self.batch_size = env_int("USER_IMPORT_BATCH_SIZE", 1000, minimum=1)
+        self.role_ids: dict[str, uuid.UUID] = {}
+        self.processed = 0
+        self.created = 0
+        self.failed = 0
+        self.batches = 0
+        self.errors: list[UserImportRowError] = []
+
+    def load_roles(self) -> None:
+        roles = self.db.execute(
+            select(Role.name, Role.id).where(Role.tenant_id == self.tenant_id)
+        ).all()
+        self.role_ids = {name: role_id for name, role_id in roles}
+
+    def _fail(self, line: int, email: str | None, errors: list[str]) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(UserImportRowError(line=line, email=email, errors=errors))
+
+    def _validate(
+        self, records: list[tuple[int, dict]]
+    ) -> list[tuple[int, UserImportRow, list[uuid.UUID]]]:
+        valid = []
+        seen: set[str] = set()
+        for line, data in records:
+            email = data.get("email") if isinstance(data.get("email"), str) else None
+            try:
+                row = UserImportRow.model_validate(data)
+                check_password_length(row.password)
+            except ValidationError as exc:
+                messages = [
+                    f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}"
+                    for err in exc.errors()
+                ]
+                self._fail(line, email, messages)
+                continue
+            except PasswordTooLongError as exc:
+                self._fail(line, email, [str(exc)])
+                continue
+
+            role_names = row.roles or [DEFAULT_IMPORT_ROLE]
+            unknown = [name for name in role_names if name not in self.role_ids]
+            if unknown:
+                self._fail(line, row.email, [f"Unknown roles: {', '.join(unknown)}"])
+                continue
+            if normalize_email(row.email) in seen:
+                self._fail(line, row.email, ["Duplicate email in upload."])
+                continue
+            seen.add(normalize_email(row.email))
+            valid.append((line, row, [self.role_ids[name] for name in role_names]))
+        return valid
+
+    def _prepare(
+        self, records: list[tuple[int, dict]]
+    ) -> list[tuple[int, UserImportRow, list[uuid.UUID]]]:
+        """Validated rows whose email isn't registered yet; runs on a worker thread."""
+        valid = self._validate(records)
+        existing = self._existing_emails([row.email for _, row, _ in valid])
+        pending = []
+        for line, row, role_ids in valid:
+            if normalize_email(row.email) in existing:
+                self._fail(line, row.email, ["Email already registered."])
+            else:
+                pending.append((line, row, role_ids))
+        return pending
+
+    def _existing_emails(self, emails: list[str]) -> set[str]:
+        if not emails:
+            return set()
+        normalized = [normalize_email(email) for email in emails]
+        # Rows written before email_normalized was backfilled only match on email.
+        return {
+            normalize_email(email)
+            for email in self.db.scalars(
+                select(User.email).where(
+                    or_(User.email_normalized.in_(normalized), User.email.in_(emails))
+                )
+            )
+        }
+
+    def _copy_rows(self, table_name: str, columns: Iterable[str], rows: list[dict]) -> None:
+        columns = list(columns)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([row[column] for column in columns])
+        buffer.seek(0)
+        cursor = self.db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {table_name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+        finally:
+            cursor.close()
+
+    def _insert_rows(self, user_rows: list[dict], user_role_rows: list[dict]) -> None:
+        try:
+            if self.db.get_bind().dialect.name == "postgresql":
+                self._copy_rows(User.__tablename__, _USER_COLUMNS, user_rows)
+                self._copy_rows(UserRole.__tablename__, _USER_ROLE_COLUMNS, user_role_rows)
+            else:
+                self.db.execute(insert(User), user_rows)
+                self.db.execute(insert(UserRole), user_role_rows)
+            increment_tenant_counters(
+                self.db,
+                self.tenant_id,
+                users=len(user_rows),
+                user_roles=len(user_role_rows),
+            )
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+    async def process_batch(self, records: list[tuple[int, dict]]) -> None:
+        self.batches += 1
+        self.processed += len(records)
+
+        # Validating a batch is CPU-bound; keep it off the event loop like the hashing.
+        pending = await run_in_threadpool(self._prepare, records)
+        if not pending:
+            return
+
+        hashes = await _hash_passwords([row.password for _, row, _ in pending])
+
+        now = datetime.utcnow()
+        user_rows = []
+        user_role_rows = []
+        for (_, row, role_ids), password_hash in zip(pending, hashes):
+            user_id = uuid7()
+            user_rows.append(
+                {
+                    "id": user_id,
+                    "tenant_id": self.tenant_id,
+                    "full_name": row.full_name,
+                    "email": row.email,
+                    "email_normalized": normalize_email(row.email),
+                    "password_hash": password_hash,
+                    "created_at": now,
+                }
+            )
+            user_role_rows.extend(
+                {"id": uuid7(), "user_id": user_id, "role_id": role_id}
+                for role_id in role_ids
+            )
+
+        try:
+            await run_in_threadpool(self._insert_rows, user_rows, user_role_rows)
+        except Exception as exc:
+            logger.warning("User import batch %s failed: %s", self.batches, exc)
+            for line, row, _ in pending:
+                self._fail(line, row.email, ["Batch insert failed; row not imported."])
+            return
+        self.created += len(user_rows)
+
+    async def run(self, chunks: AsyncIterator[bytes], fmt: str) -> UserImportResponse:
+        await run_in_threadpool(self.load_roles)
+
+        batch: list[tuple[int, dict]] = []
+        async for line, data, parse_error in iter_import_records(chunks, fmt):
+            if parse_error is not None:
+                self.processed += 1
+                self._fail(line, None, [parse_error])
+                continue
+            batch.append((line, data))
+            if len(batch) >= self.batch_size:
+                await self.process_batch(batch)
+                batch = []
+                logger.info(
+                    "User import tenant=%s processed=%s created=%s failed=%s",
+                    self.tenant_id,
+                    self.processed,
+                    self.created,
+                    self.failed,
+                )
+        if batch:
+            await self.process_batch(batch)
+
+        logger.info(
+            "User import finished tenant=%s processed=%s created=%s failed=%s",
+            self.tenant_id,
+            self.processed,
+            self.created,
+            self.failed,
+        )
+        return UserImportResponse(
+            processed=self.processed,
+            created=self.created,
+            failed=self.failed,
+            batches=self.batches,
+            errors=self.errors,
+            errors_truncated=self.failed > len(self.errors),
+        )
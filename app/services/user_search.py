@@ -0,0 +1,233 @@
+"""
+Tenant-scoped user directory search over full_name and email.
+
+  - PostgreSQL: trigram matching against lower(full_name || ' ' || email), served by
+    the (tenant_id, trigram) GIN index. Substring and typo-tolerant (word
+    similarity) matches; prefix hits on name or email rank first.
+  - SQLite: the users_fts FTS5 table; each query word is a prefix match, ranked by
+    bm25. FTS5 has no fuzzy matching, so typos don't match here.
+  - Anything else (or SQLite without the FTS table): a LIKE scan within the tenant.
+
+Results are keyset-paginated on (rank, id); the cursor is opaque to clients.
+"""
+
+import base64
+import json
+import re
+import uuid
+
+from sqlalchemy import (
+    ColumnElement,
+    DateTime,
+    Float,
+    Row,
+    Subquery,
+    Uuid,
+    and_,
+    bindparam,
+    case,
+    func,
+    literal,
+    literal_column,
+    or_,
+    select,
+    text,
+)
+from sqlalchemy.orm import Session
+
+from app.schemas.users import UserSearchHit
+from models import User
+
+_FTS_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+Cursor = tuple[float, uuid.UUID]
+Rows = list[tuple[Row, float]]
+
+_sqlite_fts_available: bool | None = None
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(rank: float, user_id: uuid.UUID) -> str:
+    raw = json.dumps([rank, str(user_id)]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, user_id = json.loads(base64.urlsafe_b64decode(padded))
+        return float(rank), uuid.UUID(user_id)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursorError("Invalid cursor.") from exc
+
+
+def _search_text() -> ColumnElement[str]:
+    # Must match the expression indexed by the user search migration.
+    return func.lower(User.full_name + literal_column("' '") + User.email)
+
+
+def _prefix_hit(query: str) -> ColumnElement[bool]:
+    return or_(
+        func.lower(User.full_name).startswith(query, autoescape=True),
+        User.email_normalized.startswith(query, autoescape=True),
+    )
+
+
+def _keyset_page(
+    db: Session, inner: Subquery, limit: int, after: Cursor | None
+) -> Rows:
+    stmt = select(inner)
+    if after is not None:
+        after_rank, after_id = after
+        stmt = stmt.where(
+            or_(
+                inner.c.rank < after_rank,
+                and_(inner.c.rank == after_rank, inner.c.id > after_id),
+            )
+        )
+    stmt = stmt.order_by(inner.c.rank.desc(), inner.c.id).limit(limit)
+    return [(row, float(row.rank)) for row in db.execute(stmt)]
+
+
+def _postgres_search(
+    db: Session, tenant_id: uuid.UUID, query: str, limit: int, after: Cursor | None
+) -> Rows:
+    search_text = _search_text()
+    rank = (
+        case((_prefix_hit(query), 1.0), else_=0.0)
+        + func.word_similarity(query, search_text)
+    ).label("rank")
+
+    inner = (
+        select(User.id, User.full_name, User.email, User.created_at, rank)
+        .where(
+            User.tenant_id == tenant_id,
+            or_(
+                search_text.contains(query, autoescape=True),
+                literal(query).op("<%")(search_text),
+            ),
+        )
+        .subquery()
+    )
+    return _keyset_page(db, inner, limit, after)
+
+
+def _fts_query(tenant_id: uuid.UUID, query: str) -> str | None:
+    tokens = _FTS_TOKEN_RE.findall(query)
+    if not tokens:
+        return None
+    # tenant_id is an indexed FTS column (the hex form SQLAlchemy stores UUIDs in on
+    # SQLite), so the tenant filter is part of the index lookup.
+    words = " ".join(f'"{token}"*' for token in tokens)
+    return f'tenant_id : "{tenant_id.hex}" AND {{full_name email}} : ({words})'
+
+
+def _has_sqlite_fts(db: Session) -> bool:
+    # Databases bootstrapped with create_all() rather than migrations have no FTS table.
+    global _sqlite_fts_available
+    if _sqlite_fts_available is None:
+        _sqlite_fts_available = (
+            db.scalar(
+                text(
+                    "SELECT 1 FROM sqlite_master "
+                    "WHERE type = 'table' AND name = 'users_fts'"
+                )
+            )
+            is not None
+        )
+    return _sqlite_fts_available
+
+
+def _sqlite_search(
+    db: Session, tenant_id: uuid.UUID, query: str, limit: int, after: Cursor | None
+) -> Rows:
+    match = _fts_query(tenant_id, query)
+    if match is None:
+        return []
+
+    # bm25() is "lower is better"; negate it so every backend ranks descending.
+    sql = """
+        SELECT hits.user_id AS id, users.full_name, users.email, users.created_at,
+               hits.rank AS rank
+        FROM (
+            SELECT user_id, -bm25(users_fts, 2.0, 1.0, 0.0, 0.0) AS rank
+            FROM users_fts
+            WHERE users_fts MATCH :match
+        ) AS hits
+        JOIN users ON users.id = hits.user_id
+    """
+    params = {"match": match}
+    if after is not None:
+        sql += (
+            " WHERE hits.rank < :after_rank"
+            " OR (hits.rank = :after_rank AND hits.user_id > :after_id)"
+        )
+        params["after_rank"], params["after_id"] = after
+    sql += " ORDER BY hits.rank DESC, hits.user_id LIMIT :limit"
+    params["limit"] = limit
+
+    stmt = text(sql)
+    if after is not None:
+        stmt = stmt.bindparams(bindparam("after_id", type_=Uuid()))
+    stmt = stmt.columns(id=Uuid(), created_at=DateTime(timezone=True), rank=Float())
+    return [(row, float(row.rank)) for row in db.execute(stmt, params)]
+
+
+def _like_search(
+    db: Session, tenant_id: uuid.UUID, query: str, limit: int, after: Cursor | None
+) -> Rows:
+    search_text = _search_text()
+    rank = case((_prefix_hit(query), 1.0), else_=0.0).label("rank")
+    inner = (
+        select(User.id, User.full_name, User.email, User.created_at, rank)
+        .where(
+            User.tenant_id == tenant_id,
+            search_text.contains(query, autoescape=True),
+        )
+        .subquery()
+    )
+    return _keyset_page(db, inner, limit, after)
+
+
+def search_users(
+    db: Session,
+    tenant_id: uuid.UUID,
+    query: str,
+    limit: int,
+    cursor: str | None = None,
+) -> tuple[list[UserSearchHit], str | None]:
+    query = query.strip().lower()
+    if not query:
+        # The backends disagree on an empty query (everything vs nothing); match nothing.
+        return [], None
+    after = decode_cursor(cursor) if cursor else None
+
+    dialect = db.get_bind().dialect.name
+    # Fetch one extra row to know whether there is a next page.
+    if dialect == "postgresql":
+        rows = _postgres_search(db, tenant_id, query, limit + 1, after)
+    elif dialect == "sqlite" and _has_sqlite_fts(db):
+        rows = _sqlite_search(db, tenant_id, query, limit + 1, after)
+    else:
+        rows = _like_search(db, tenant_id, query, limit + 1, after)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_row, last_rank = rows[-1]
+        next_cursor = encode_cursor(last_rank, last_row.id)
+
+    hits = [
+        UserSearchHit(
+            id=row.id,
+            full_name=row.full_name,
+            email=row.email,
+            created_at=row.created_at,
+            rank=rank,
+        )
+        for row, rank in rows
+    ]
+    return hits, next_cursor
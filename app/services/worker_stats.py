@@ -0,0 +1,158 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import anyio.to_thread
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.admission import admission_controller
+from app.services.password_hashing import password_timings
+from app.services.statements import statement_cache_stats
+from app.services.threadpool import threadpool_snapshot
+from app.services.tracing import trace_export_stats
+
+# Each worker process owns one JSON file in this directory; any worker can read all
+# of them, so stats for the whole pre-forked server are visible from one request.
+FLUSH_INTERVAL_SECONDS = 1.0
+
+
+def _stats_dir() -> Path:
+    return Path(
+        os.getenv("WORKER_STATS_DIR", "")
+        or os.path.join(tempfile.gettempdir(), "skylynx-worker-stats")
+    )
+
+
+class WorkerStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Start fresh counters for the current process (called after fork)."""
+        with self._lock:
+            self.pid = os.getpid()
+            self.started_at = time.time()
+            self.requests = 0
+            self.in_flight = 0
+            self.errors = 0
+            self.total_latency_seconds = 0.0
+            self._last_flush = 0.0
+
+    def request_started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self, status_code: int, latency_seconds: float) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.requests += 1
+            self.total_latency_seconds += latency_seconds
+            if status_code >= 500:
+                self.errors += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "pid": self.pid,
+                "started_at": self.started_at,
+                "updated_at": time.time(),
+                "requests": self.requests,
+                "in_flight": self.in_flight,
+                "errors": self.errors,
+                "avg_latency_ms": (
+                    self.total_latency_seconds / self.requests * 1000
+                    if self.requests
+                    else 0.0
+                ),
+                "admission": admission_controller.snapshot(),
+                "threadpool": threadpool_snapshot(),
+                "password_hashing": password_timings.snapshot(),
+                "statements": statement_cache_stats.snapshot(),
+                "tracing": trace_export_stats.snapshot(),
+            }
+
+    def flush_due(self) -> bool:
+        return time.monotonic() - self._last_flush >= FLUSH_INTERVAL_SECONDS
+
+    def flush(self, force: bool = False) -> None:
+        """Write this worker's stats file; blocking I/O, so not on the event loop."""
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_flush < FLUSH_INTERVAL_SECONDS:
+                return
+            self._last_flush = now
+        directory = _stats_dir()
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"{self.pid}.json"
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(self.snapshot()))
+            tmp_path.replace(path)
+        except OSError:
+            # Stats are best effort; never fail a request over them.
+            pass
+
+    def remove(self) -> None:
+        try:
+            (_stats_dir() / f"{self.pid}.json").unlink(missing_ok=True)
+        except OSError:
+            pass
+
+
+worker_stats = WorkerStats()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_worker_stats() -> list[dict]:
+    worker_stats.flush(force=True)
+    stats = []
+    for path in sorted(_stats_dir().glob("*.json")):
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        if not _pid_alive(int(data.get("pid", 0))):
+            path.unlink(missing_ok=True)
+            continue
+        stats.append(data)
+    return stats
+
+
+class WorkerStatsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        worker_stats.request_started()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            worker_stats.request_finished(status_code, time.perf_counter() - started)
+            if worker_stats.flush_due():
+                await anyio.to_thread.run_sync(worker_stats.flush)
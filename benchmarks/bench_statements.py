@@ -0,0 +1,193 @@
+"""
+Per-call Python overhead of the hot queries: inline select() vs the lambda
+statements in app/services/statements.py.
+
+Seeds a tenant (roles, permissions, users) into a throwaway database, then for
+each hot query times the same lookup both ways (best of --rounds loops):
+
+    python3 benchmarks/bench_statements.py                    # SQLite temp file
+    python3 benchmarks/bench_statements.py --iterations 50000 \\
+        --database-url postgresql+psycopg2://localhost/skylynx_bench
+
+Reports microseconds per call for building the statement plus its cache key
+alone ("build") and for a full execute with rows fetched ("execute"), the time
+saved per call, and the compiled-cache hit rate per statement. The benchmark
+tables are dropped afterwards.
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from sqlalchemy import create_engine, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+import app.models.idempotency  # noqa: E402,F401
+import app.models.tenant_counters  # noqa: E402,F401
+from app.models.rbac import Permission, Role, RolePermission, UserRole  # noqa: E402
+from app.services import statements  # noqa: E402
+from models import Base, Tenant, User  # noqa: E402
+
+
+def _seed(session: Session, users: int) -> dict:
+    tenant = Tenant(company_name="Bench Co")
+    session.add(tenant)
+    session.flush()
+    permissions = [Permission(code=f"bench:perm:{i}", description="") for i in range(20)]
+    roles = [Role(tenant_id=tenant.id, name=f"Role {i}") for i in range(5)]
+    session.add_all(permissions + roles)
+    session.flush()
+    for index, role in enumerate(roles):
+        for permission in permissions[index * 4 : index * 4 + 8]:
+            session.add(RolePermission(role_id=role.id, permission_id=permission.id))
+    people = [
+        User(
+            tenant_id=tenant.id,
+            full_name=f"User {i}",
+            email=f"user{i}@bench.test",
+            email_normalized=f"user{i}@bench.test",
+            password_hash="x",
+        )
+        for i in range(users)
+    ]
+    session.add_all(people)
+    session.flush()
+    for index, person in enumerate(people):
+        session.add(UserRole(user_id=person.id, role_id=roles[index % len(roles)].id))
+    session.commit()
+    return {
+        "tenant_id": tenant.id,
+        "user_id": people[0].id,
+        "user_ids": [person.id for person in people[:10]],
+        "email": people[0].email,
+        "codes": [permission.code for permission in permissions[:6]],
+    }
+
+
+def _inline_queries(seed: dict) -> dict:
+    return {
+        "user_by_email": lambda: select(User).where(User.email == seed["email"]),
+        "user_permission_codes": lambda: select(Permission.code)
+        .join(RolePermission, Permission.id == RolePermission.permission_id)
+        .join(Role, Role.id == RolePermission.role_id)
+        .join(UserRole, UserRole.role_id == Role.id)
+        .where(UserRole.user_id == seed["user_id"]),
+        "permission_codes_by_user": lambda: select(User.id, Permission.code)
+        .outerjoin(UserRole, UserRole.user_id == User.id)
+        .outerjoin(Role, Role.id == UserRole.role_id)
+        .outerjoin(RolePermission, RolePermission.role_id == Role.id)
+        .outerjoin(Permission, Permission.id == RolePermission.permission_id)
+        .where(User.id.in_(seed["user_ids"]), User.tenant_id == seed["tenant_id"]),
+        "tenant_roles": lambda: select(Role)
+        .where(Role.tenant_id == seed["tenant_id"])
+        .order_by(Role.name),
+        "permissions_by_codes": lambda: select(Permission).where(
+            Permission.code.in_(seed["codes"])
+        ),
+    }
+
+
+def _registry_queries(seed: dict) -> dict:
+    return {
+        "user_by_email": lambda: statements.user_by_email(seed["email"]),
+        "user_permission_codes": lambda: statements.user_permission_codes(seed["user_id"]),
+        "permission_codes_by_user": lambda: statements.permission_codes_by_user(
+            seed["tenant_id"], seed["user_ids"]
+        ),
+        "tenant_roles": lambda: statements.tenant_roles(seed["tenant_id"]),
+        "permissions_by_codes": lambda: statements.permissions_by_codes(seed["codes"]),
+    }
+
+
+def _best_of(rounds: int, run_once, iterations: int) -> float:
+    """Fastest of `rounds` timed loops, in microseconds per call."""
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            run_once()
+        best = min(best, time.perf_counter() - started)
+    return best / iterations * 1e6
+
+
+def _time_build(build, iterations: int, rounds: int) -> float:
+    return _best_of(rounds, lambda: build()._generate_cache_key(), iterations)
+
+
+def _time_execute(session: Session, build, iterations: int, rounds: int) -> float:
+    return _best_of(rounds, lambda: session.execute(build()).all(), iterations)
+
+
+def run(database_url: str | None, iterations: int, rounds: int, users: int) -> None:
+    workdir = None
+    if database_url is None:
+        workdir = Path(tempfile.mkdtemp(prefix="skylynx-statements-bench-"))
+        database_url = f"sqlite:///{workdir / 'bench.db'}"
+    engine = create_engine(database_url)
+    statements.instrument_statement_cache(engine)
+    try:
+        Base.metadata.drop_all(engine)
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            seed = _seed(session, users)
+            inline = _inline_queries(seed)
+            registry = _registry_queries(seed)
+
+            print(
+                f"{engine.dialect.name}: best of {rounds} x {iterations:,} calls per query, "
+                f"{users:,} users"
+            )
+            print(
+                f"{'query':<26} {'build inline':>12} {'build lambda':>12} "
+                f"{'exec inline':>12} {'exec lambda':>12} {'saved/call':>11}"
+            )
+            statements.statement_cache_stats.reset()
+            for name in inline:
+                # Warm both paths so the first compile isn't counted, and check that
+                # they agree.
+                expected = session.execute(inline[name]()).all()
+                if session.execute(registry[name]()).all() != expected:
+                    raise SystemExit(f"{name}: lambda statement returned different rows")
+                build_inline = _time_build(inline[name], iterations, rounds)
+                build_lambda = _time_build(registry[name], iterations, rounds)
+                exec_inline = _time_execute(session, inline[name], iterations, rounds)
+                exec_lambda = _time_execute(session, registry[name], iterations, rounds)
+                print(
+                    f"{name:<26} {build_inline:>10.1f}us {build_lambda:>10.1f}us "
+                    f"{exec_inline:>10.1f}us {exec_lambda:>10.1f}us "
+                    f"{exec_inline - exec_lambda:>9.1f}us",
+                    flush=True,
+                )
+
+        print()
+        print(f"{'statement':<26} {'hits':>8} {'misses':>8} {'hit rate':>9}")
+        for name, counts in statements.statement_cache_stats.snapshot().items():
+            print(
+                f"{name:<26} {counts['hits']:>8,} {counts['misses']:>8,} "
+                f"{counts['hit_rate']:>8.1%}"
+            )
+    finally:
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url")
+    parser.add_argument("--iterations", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--users", type=int, default=500)
+    args = parser.parse_args()
+    run(args.database_url, args.iterations, args.rounds, args.users)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+User directory search latency at 1M users.
+
+By default builds a throwaway SQLite database with all migrations applied (so the
+users_fts table exists), loads --users users spread over --tenants tenants, then
+times search_users() for a mix of prefix, multi-word and email queries against
+the unindexed LIKE scan it replaces:
+
+    python3 benchmarks/bench_user_search.py
+    python3 benchmarks/bench_user_search.py --users 200000 --queries 200
+
+Pass --database-url to run against an already migrated PostgreSQL database
+instead (rows are added to it; use a scratch database).
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+import app.models.rbac  # noqa: E402,F401 - registers UserRole for the User mapper
+from app.services import user_search  # noqa: E402
+from models import Tenant, User  # noqa: E402
+
+FIRST_NAMES = [
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda",
+    "William", "Elizabeth", "David", "Barbara", "Richard", "Susan", "Joseph", "Jessica",
+    "Thomas", "Sarah", "Charles", "Karen", "Wei", "Siti", "Arjun", "Mei", "Ahmad",
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
+    "Tan", "Lim", "Lee", "Ng", "Wong", "Rahman", "Kumar", "Chen", "Goh", "Ong",
+]
+
+
+def _migrate_sqlite(workdir: Path) -> str:
+    env = {**os.environ, "PYTHONPATH": str(REPO_ROOT)}
+    for key in ("INSTANCE_CONNECTION_NAME", "K_SERVICE", "PORT"):
+        env.pop(key, None)
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "-c", str(REPO_ROOT / "alembic.ini"), "upgrade", "head"],
+        cwd=workdir,
+        env=env,
+        check=True,
+        capture_output=True,
+    )
+    return f"sqlite:///{workdir / 'local.db'}"
+
+
+def _load(engine, users: int, tenants: int, batch_size: int = 20000) -> list[uuid.UUID]:
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    tenant_ids = [uuid.uuid4() for _ in range(tenants)]
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Tenant),
+            [{"id": tid, "company_name": f"Tenant {i}", "created_at": now} for i, tid in enumerate(tenant_ids)],
+        )
+
+    started = time.perf_counter()
+    for offset in range(0, users, batch_size):
+        rows = []
+        for n in range(offset, min(offset + batch_size, users)):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            email = f"{first}.{last}{n}@example.com".lower()
+            rows.append(
+                {
+                    "id": uuid.uuid4(),
+                    "tenant_id": tenant_ids[n % tenants],
+                    "full_name": f"{first} {last}",
+                    "email": email,
+                    "email_normalized": email,
+                    "password_hash": "x",
+                    "created_at": now,
+                }
+            )
+        with engine.begin() as conn:
+            conn.execute(insert(User), rows)
+        print(f"\rloaded {offset + len(rows):,}/{users:,} users", end="", flush=True)
+    print(f"  ({time.perf_counter() - started:.1f}s)")
+    return tenant_ids
+
+
+def _queries(count: int) -> list[str]:
+    rng = random.Random(7)
+    queries = []
+    for _ in range(count):
+        kind = rng.random()
+        first, last = rng.choice(FIRST_NAMES).lower(), rng.choice(LAST_NAMES).lower()
+        if kind < 0.4:
+            queries.append(first[: rng.randint(2, 4)])
+        elif kind < 0.7:
+            queries.append(f"{first} {last[:3]}")
+        else:
+            queries.append(f"{first}.{last}{rng.randint(0, 999)}")
+    return queries
+
+
+def _time(fn, tenant_ids: list[uuid.UUID], queries: list[str]) -> list[float]:
+    timings = []
+    for i, query in enumerate(queries):
+        started = time.perf_counter()
+        fn(tenant_ids[i % len(tenant_ids)], query)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def _report(label: str, timings: list[float]) -> None:
+    ordered = sorted(timings)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(
+        f"{label:<24} p50={statistics.median(ordered):8.2f} ms  "
+        f"p95={p95:8.2f} ms  max={ordered[-1]:8.2f} ms"
+    )
+
+
+def run(database_url: str | None, users: int, tenants: int, query_count: int, limit: int) -> None:
+    workdir = None
+    if database_url is None:
+        workdir = Path(tempfile.mkdtemp(prefix="skylynx-search-bench-"))
+        database_url = _migrate_sqlite(workdir)
+    try:
+        engine = create_engine(database_url)
+        tenant_ids = _load(engine, users, tenants)
+        queries = _queries(query_count)
+
+        with Session(engine) as db:
+            def indexed(tenant_id, query):
+                hits, cursor = user_search.search_users(db, tenant_id, query, limit)
+                if cursor:
+                    user_search.search_users(db, tenant_id, query, limit, cursor)
+
+            def scan(tenant_id, query):
+                user_search._like_search(db, tenant_id, query, limit + 1, None)
+
+            # Warm caches so both sides are measured hot.
+            _time(indexed, tenant_ids, queries[:10])
+            _time(scan, tenant_ids, queries[:10])
+
+            print(f"\n{users:,} users, {tenants} tenants, {query_count} queries, limit {limit}")
+            _report("indexed (2 pages)", _time(indexed, tenant_ids, queries))
+            _report("LIKE scan (1 page)", _time(scan, tenant_ids, queries))
+    finally:
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--tenants", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    run(args.database_url, args.users, args.tenants, args.queries, args.limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Insert throughput and index size with uuid4 vs uuid7 keys.
+
+Builds a user_roles-shaped table (UUID primary key plus a unique (user_id, role_id)
+index) once per generator and bulk-inserts the same number of rows, the way bulk
+user import provisions assignments:
+
+    python3 benchmarks/bench_uuid_keys.py                      # SQLite temp file
+    python3 benchmarks/bench_uuid_keys.py --rows 2000000 \\
+        --database-url postgresql+psycopg2://localhost/skylynx_bench
+
+Reports rows/second overall and for the last tenth of the load (where random keys
+hurt most), plus on-disk index size; on PostgreSQL also the WAL generated. The
+benchmark tables are dropped afterwards.
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from sqlalchemy import (  # noqa: E402
+    Column,
+    MetaData,
+    Table,
+    UniqueConstraint,
+    create_engine,
+    text,
+)
+from sqlalchemy.dialects.postgresql import UUID  # noqa: E402
+
+from models import uuid7  # noqa: E402
+
+GENERATORS = {"uuid4": uuid.uuid4, "uuid7": uuid7}
+
+
+def _table(metadata: MetaData, name: str) -> Table:
+    return Table(
+        f"bench_{name}_keys",
+        metadata,
+        Column("id", UUID(as_uuid=True), primary_key=True),
+        Column("user_id", UUID(as_uuid=True), nullable=False),
+        Column("role_id", UUID(as_uuid=True), nullable=False),
+        UniqueConstraint("user_id", "role_id", name=f"uq_bench_{name}_keys"),
+    )
+
+
+def _index_bytes(conn, table: Table) -> int:
+    if conn.dialect.name == "postgresql":
+        return conn.scalar(
+            text(
+                "SELECT COALESCE(SUM(pg_relation_size(indexrelid)), 0) "
+                "FROM pg_index WHERE indrelid = CAST(:table AS regclass)"
+            ),
+            {"table": table.name},
+        )
+    return conn.scalar(
+        text(
+            "SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name IN "
+            "(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table)"
+        ),
+        {"table": table.name},
+    )
+
+
+def _wal_lsn(conn) -> str | None:
+    if conn.dialect.name != "postgresql":
+        return None
+    return conn.scalar(text("SELECT pg_current_wal_insert_lsn()"))
+
+
+def _wal_bytes(conn, start: str | None) -> int | None:
+    if start is None:
+        return None
+    return conn.scalar(
+        text("SELECT pg_wal_lsn_diff(pg_current_wal_insert_lsn(), CAST(:lsn AS pg_lsn))"),
+        {"lsn": start},
+    )
+
+
+def _load(engine, table: Table, new_id, rows: int, batch_size: int) -> dict:
+    roles = [new_id() for _ in range(3)]
+    tail_start = rows - rows // 10
+    tail_started = None
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        wal_start = _wal_lsn(conn)
+    for offset in range(0, rows, batch_size):
+        if tail_started is None and offset >= tail_start:
+            tail_started = time.perf_counter()
+        batch = []
+        # Each imported user gets one to three role assignments.
+        while len(batch) < min(batch_size, rows - offset):
+            user_id = new_id()
+            for role_id in roles[: 1 + len(batch) % 3]:
+                batch.append({"id": new_id(), "user_id": user_id, "role_id": role_id})
+        with engine.begin() as conn:
+            conn.execute(table.insert(), batch[: rows - offset])
+    finished = time.perf_counter()
+
+    with engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text(f"ANALYZE {table.name}"))
+        result = {
+            "rows_per_second": rows / (finished - started),
+            "tail_rows_per_second": (rows - tail_start) / (finished - (tail_started or started)),
+            "index_bytes": _index_bytes(conn, table),
+            "wal_bytes": _wal_bytes(conn, wal_start),
+        }
+    return result
+
+
+def _mb(value: int | None) -> str:
+    return "-" if value is None else f"{value / 1024 / 1024:.1f} MB"
+
+
+def run(database_url: str | None, rows: int, batch_size: int) -> None:
+    workdir = None
+    if database_url is None:
+        workdir = Path(tempfile.mkdtemp(prefix="skylynx-uuid-bench-"))
+        database_url = f"sqlite:///{workdir / 'bench.db'}"
+    engine = create_engine(database_url)
+    metadata = MetaData()
+    tables = {name: _table(metadata, name) for name in GENERATORS}
+    try:
+        metadata.drop_all(engine)
+        metadata.create_all(engine)
+        print(f"{engine.dialect.name}: {rows:,} rows, batches of {batch_size:,}")
+        print(f"{'key':<6} {'rows/s':>10} {'last 10% rows/s':>16} {'index size':>11} {'WAL':>10}")
+        for name, new_id in GENERATORS.items():
+            result = _load(engine, tables[name], new_id, rows, batch_size)
+            print(
+                f"{name:<6} {result['rows_per_second']:>10,.0f} "
+                f"{result['tail_rows_per_second']:>16,.0f} "
+                f"{_mb(result['index_bytes']):>11} {_mb(result['wal_bytes']):>10}",
+                flush=True,
+            )
+    finally:
+        metadata.drop_all(engine)
+        engine.dispose()
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+    run(args.database_url, args.rows, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Throughput scaling of server.py from 1 to N pre-forked workers.
+
+Runs against a throwaway SQLite database in a temp directory:
+
+    python3 benchmarks/bench_workers.py                  # 1, 2, 4, ... up to CPU count
+    python3 benchmarks/bench_workers.py --workers 1 2 4 --duration 15
+
+For each worker count it starts the server, registers one user and drives
+/auth/login (bcrypt-bound) and /health (framework overhead) from client threads,
+then prints requests/second and speed-up relative to one worker.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _request(conn: http.client.HTTPConnection, method: str, path: str, body: dict | None):
+    payload = json.dumps(body) if body is not None else None
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    conn.request(method, path, body=payload, headers=headers)
+    response = conn.getresponse()
+    response.read()
+    return response.status
+
+
+def _wait_until_ready(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            if _request(conn, "GET", "/health", None) == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+
+def _drive(port: int, method: str, path: str, body: dict | None, clients: int, duration: float) -> float:
+    completed = 0
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client() -> None:
+        nonlocal completed
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        done = 0
+        while time.monotonic() < stop_at:
+            if _request(conn, method, path, body) < 500:
+                done += 1
+        with lock:
+            completed += done
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return completed / (time.monotonic() - started)
+
+
+def run(worker_counts: list[int], duration: float, clients_per_worker: int) -> None:
+    workdir = Path(tempfile.mkdtemp(prefix="skylynx-bench-"))
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(REPO_ROOT),
+        "JWT_SECRET": "bench-secret",
+        "LOG_LEVEL": "WARNING",
+        "WORKER_STATS_DIR": str(workdir / "stats"),
+    }
+    env.pop("PORT", None)
+    env.pop("K_SERVICE", None)
+    try:
+        subprocess.run(
+            [sys.executable, "-m", "alembic", "-c", str(REPO_ROOT / "alembic.ini"), "upgrade", "head"],
+            cwd=workdir,
+            env=env,
+            check=True,
+            capture_output=True,
+        )
+        credentials = {"email": "bench@example.com", "password": "bench-password"}
+
+        results = []
+        for workers in worker_counts:
+            port = _free_port()
+            server = subprocess.Popen(
+                [sys.executable, str(REPO_ROOT / "server.py"), "--workers", str(workers), "--bind", f"127.0.0.1:{port}"],
+                cwd=workdir,
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                _wait_until_ready(port)
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                _request(conn, "POST", "/auth/register", {"company_name": "Bench", "full_name": "Bench", **credentials})
+
+                clients = workers * clients_per_worker
+                login_rps = _drive(port, "POST", "/auth/login", credentials, clients, duration)
+                health_rps = _drive(port, "GET", "/health", None, clients, duration)
+                results.append((workers, login_rps, health_rps))
+                print(f"workers={workers:<3} login={login_rps:8.1f} req/s  health={health_rps:8.1f} req/s", flush=True)
+            finally:
+                server.terminate()
+                server.wait(timeout=60)
+
+        base_login, base_health = results[0][1], results[0][2]
+        print()
+        print(f"{'workers':>7} {'login req/s':>12} {'speed-up':>9} {'health req/s':>13} {'speed-up':>9}")
+        for workers, login_rps, health_rps in results:
+            print(
+                f"{workers:>7} {login_rps:>12.1f} {login_rps / base_login:>8.2f}x "
+                f"{health_rps:>13.1f} {health_rps / base_health:>8.2f}x"
+            )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main() -> None:
+    cpus = os.cpu_count() or 1
+    defaults = sorted({1, *(2**i for i in range(1, 8) if 2**i < cpus), cpus})
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=defaults)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per endpoint")
+    parser.add_argument("--clients-per-worker", type=int, default=4)
+    args = parser.parse_args()
+    run(args.workers, args.duration, args.clients_per_worker)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
 import os
+import threading
+import time
 from urllib.parse import quote_plus
 
 from typing import Generator
 
 from sqlalchemy import create_engine
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 
 
 def _is_cloud_run() -> bool:
@@ -50,6 +53,45 @@ def _build_database_url() -> str:
     return "sqlite:///./local.db"
 
 
+class PoolWaitStats:
+    """Time spent waiting for a pooled connection, drained by the admission controller."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def drain(self) -> tuple[int, float, float]:
+        """(checkouts, total seconds, max seconds) since the previous drain."""
+        with self._lock:
+            sample = (self.checkouts, self.total_seconds, self.max_seconds)
+            self.checkouts = 0
+            self.total_seconds = 0.0
+            self.max_seconds = 0.0
+            return sample
+
+
+pool_wait = PoolWaitStats()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout took, including any wait."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait.record(time.perf_counter() - started)
+
+
 DATABASE_URL = _build_database_url()
 
 connect_args = {}
@@ -59,6 +101,7 @@ if DATABASE_URL.startswith("sqlite"):
 engine = create_engine(
     DATABASE_URL,
     pool_pre_ping=True,
+    poolclass=TimedQueuePool,
     connect_args=connect_args,
 )
 
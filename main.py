@@ -1,25 +1,57 @@
 import logging
 import os
+import uuid
 
-from fastapi import Depends, FastAPI, HTTPException, Request, status
+from fastapi import BackgroundTasks, Depends, FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from sqlalchemy import select
+from sqlalchemy import update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from app.routers.erp import router as erp_router
+from app.routers.internal import router as internal_router
 from app.routers.rbac import router as rbac_router
+from app.routers.tenant import router as tenant_router
+from app.routers.users import router as users_router
 from app.security.rbac import MissingPermissionsError
-from app.services.rbac_service import create_default_roles_for_tenant
-from db import engine, get_db
-from models import Base, Tenant, User
-from schemas import LoginRequest, RegisterRequest, TokenResponse
-from security import (
-    PasswordTooLongError,
-    create_access_token,
+from app.services.admission import AdmissionMiddleware
+from app.services.idempotency import (
+    IdempotentAPIRoute,
+    idempotent,
+    start_idempotency_gc,
+)
+from app.services.password_hashing import (
+    configure_password_hashing,
     hash_password,
+    password_needs_rehash,
+    password_timings,
     verify_password,
 )
+from app.services.rbac_service import create_default_roles_for_tenant
+from app.services.statements import (
+    instrument_statement_cache,
+    user_by_email,
+    users_by_email_normalized,
+)
+from app.services.tenant_counters import (
+    create_tenant_counters,
+    increment_tenant_counters,
+    start_counter_reconciler,
+)
+from app.services.threadpool import (
+    AUTH_GROUP,
+    configure_threadpool,
+    run_in_thread_group,
+    thread_group,
+)
+from app.services.tracing import TracingMiddleware, instrument_engine
+from app.services.user_import import shutdown_hash_pool
+from app.services.worker_stats import WorkerStatsMiddleware, worker_stats
+from db import SessionLocal, engine, get_db
+from models import Base, Tenant, User, normalize_email
+from schemas import LoginRequest, RegisterRequest, TokenResponse
+from security import PasswordTooLongError, create_access_token
 
 logger = logging.getLogger("skylynx-api")
 logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
@@ -41,7 +73,9 @@ def _build_cors_origins() -> list[str]:
 
 
 app = FastAPI(title="Skylynx ERP API")
+app.router.route_class = IdempotentAPIRoute
 
+app.add_middleware(AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=_build_cors_origins(),
@@ -49,8 +83,17 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(WorkerStatsMiddleware)
+app.add_middleware(TracingMiddleware)
+
+instrument_engine(engine)
+instrument_statement_cache(engine)
 
+app.include_router(erp_router)
+app.include_router(internal_router)
 app.include_router(rbac_router)
+app.include_router(tenant_router)
+app.include_router(users_router)
 
 
 @app.exception_handler(MissingPermissionsError)
@@ -86,22 +129,52 @@ def on_startup() -> None:
         Base.metadata.create_all(bind=engine)
     else:
         logger.info("AUTO_CREATE_SCHEMA is disabled -> NOT running create_all()")
+    configure_threadpool()
+    configure_password_hashing()
+    start_idempotency_gc()
+    start_counter_reconciler()
+
+
+@app.on_event("shutdown")
+def on_shutdown() -> None:
+    shutdown_hash_pool()
+    worker_stats.remove()
 
 
+# root and health are async so they never queue for a thread group: the
+# app-wide route class would otherwise put them in "db" and probes could get
+# the queue-timeout 503 while the pool is saturated.
 @app.get("/")
-def root() -> dict:
+async def root() -> dict:
     return {"ok": True, "service": "skylynx-api", "docs": "/docs", "health": "/health"}
 
 
 @app.get("/health")
-def health() -> dict:
+async def health() -> dict:
     return {"ok": True}
 
 
+def _find_users_by_email(db: Session, email: str) -> list[User]:
+    """
+    Accounts matching `email`: the exact (case-sensitive) match if there is one,
+    else every user whose normalized email matches.
+
+    `email` stays the identity column. Older releases allowed addresses differing
+    only in case, and rows they insert have no email_normalized until a cleanup
+    migration backfills it and makes it unique, so the normalized match is only a
+    convenience on top of the exact one.
+    """
+    user = db.scalar(user_by_email(email))
+    if user:
+        return [user]
+    return list(db.scalars(users_by_email_normalized(normalize_email(email))))
+
+
 @app.post("/auth/register", status_code=status.HTTP_201_CREATED)
+@thread_group(AUTH_GROUP)
+@idempotent
 def register(payload: RegisterRequest, db: Session = Depends(get_db)) -> dict:
-    existing = db.scalar(select(User).where(User.email == payload.email))
-    if existing:
+    if _find_users_by_email(db, payload.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered.",
@@ -125,6 +198,8 @@ def register(payload: RegisterRequest, db: Session = Depends(get_db)) -> dict:
     db.add_all([tenant, user])
     try:
         db.flush()
+        create_tenant_counters(db, tenant.id)
+        increment_tenant_counters(db, tenant.id, users=1)
         create_default_roles_for_tenant(db, tenant, user)
         db.commit()
     except IntegrityError:
@@ -143,14 +218,50 @@ def register(payload: RegisterRequest, db: Session = Depends(get_db)) -> dict:
     return {"tenant_id": str(tenant.id), "user_id": str(user.id)}
 
 
+def _rehash_password(user_id: uuid.UUID, old_hash: str, password: str) -> None:
+    try:
+        new_hash = hash_password(password)
+        with SessionLocal() as db:
+            # Skip if the password was changed since the login that scheduled this.
+            result = db.execute(
+                update(User)
+                .where(User.id == user_id, User.password_hash == old_hash)
+                .values(password_hash=new_hash)
+            )
+            db.commit()
+        if result.rowcount:
+            password_timings.record_rehash()
+    except Exception as exc:
+        logger.warning("Password rehash for user %s failed: %s", user_id, exc)
+
+
 @app.post("/auth/login", response_model=TokenResponse)
-def login(payload: LoginRequest, db: Session = Depends(get_db)) -> TokenResponse:
-    user = db.scalar(select(User).where(User.email == payload.email))
+@thread_group(AUTH_GROUP)
+def login(
+    payload: LoginRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+) -> TokenResponse:
+    users = _find_users_by_email(db, payload.email)
+    # Case variants of one address are ambiguous; those accounts need the exact email.
+    user = users[0] if len(users) == 1 else None
     if not user or not verify_password(payload.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials.",
         )
 
+    if password_needs_rehash(user.password_hash):
+        # After the response is sent, so the login doesn't pay for a second hash;
+        # in the auth group, so rehashes share its limit with logins.
+        background_tasks.add_task(
+            run_in_thread_group,
+            AUTH_GROUP,
+            _rehash_password,
+            user.id,
+            user.password_hash,
+            payload.password,
+        )
+
     token = create_access_token(subject=str(user.id), tenant_id=str(user.tenant_id))
     return TokenResponse(access_token=token)
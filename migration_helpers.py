@@ -0,0 +1,250 @@
+"""
+Helpers for migrations that must run against live, populated tables.
+
+Plain op.create_index / UPDATE ... take locks for the whole statement on hot tables
+(users, user_roles, role_permissions). Use these instead from Alembic revisions:
+
+  - create_index_concurrently / drop_index_concurrently:
+      CREATE/DROP INDEX CONCURRENTLY outside the migration transaction on Postgres,
+      plain CREATE/DROP INDEX elsewhere (SQLite).
+  - run_chunked_backfill:
+      keyset-paginated UPDATEs, each committed on its own, with a pause between
+      chunks. Re-running picks up where it stopped because only rows still matching
+      the `pending` predicate are touched. Rows the old release keeps inserting are
+      not covered once the migration finishes: code must tolerate `pending` rows
+      until a cleanup revision re-runs the backfill after the old release is gone.
+
+Seed data:
+
+  - add_permission / remove_permission:
+      insert a permission into the catalogue and grant it to every existing Admin
+      role (new tenants get it from create_default_roles_for_tenant), and undo that.
+"""
+
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+from settings import env_float, env_int
+
+logger = logging.getLogger("alembic.helpers")
+
+
+def _is_postgres() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def _drop_invalid_postgres_index(index_name: str) -> None:
+    # A failed CREATE INDEX CONCURRENTLY leaves an INVALID index behind that
+    # IF NOT EXISTS would silently keep; clear it so a rerun rebuilds it.
+    invalid = op.get_bind().execute(
+        sa.text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ),
+        {"name": index_name},
+    ).first()
+    if invalid:
+        logger.warning("Dropping invalid index %s left by an earlier run", index_name)
+        op.execute(sa.text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index_name}"'))
+
+
+def create_index_concurrently(
+    index_name: str,
+    table_name: str,
+    columns: Sequence[str | sa.sql.ClauseElement],
+    unique: bool = False,
+    **kw: Any,
+) -> None:
+    if not _is_postgres():
+        op.create_index(
+            index_name, table_name, columns, unique=unique, if_not_exists=True, **kw
+        )
+        return
+
+    with op.get_context().autocommit_block():
+        _drop_invalid_postgres_index(index_name)
+        op.create_index(
+            index_name,
+            table_name,
+            columns,
+            unique=unique,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+            **kw,
+        )
+
+
+def drop_index_concurrently(index_name: str, table_name: str) -> None:
+    if not _is_postgres():
+        op.drop_index(index_name, table_name=table_name, if_exists=True)
+        return
+
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            index_name,
+            table_name=table_name,
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def run_chunked_backfill(
+    table: sa.TableClause,
+    key: sa.ColumnClause,
+    values: dict[str, Any],
+    pending: sa.ColumnElement[bool],
+    batch_size: int | None = None,
+    pause_seconds: float | None = None,
+    max_sweeps: int = 5,
+) -> int:
+    """
+    UPDATE `table` SET `values` for every row matching `pending`, `batch_size` rows
+    at a time in `key` order. Runs in an autocommit block, so each chunk commits on
+    its own: locks are short-lived and an interrupted run keeps its progress.
+    Returns the number of rows updated.
+
+    Random (uuid4) keys let rows inserted during the run land behind the keyset
+    position, so once the end is reached the scan starts over, up to
+    `max_sweeps` times, until no pending rows are left; anything still pending
+    after that is updated in one final statement.
+
+    Defaults come from MIGRATION_BACKFILL_BATCH_SIZE (1000) and
+    MIGRATION_BACKFILL_PAUSE_SECONDS (0.05).
+    """
+    if batch_size is None:
+        batch_size = env_int("MIGRATION_BACKFILL_BATCH_SIZE", 1000, minimum=1)
+    if pause_seconds is None:
+        pause_seconds = env_float("MIGRATION_BACKFILL_PAUSE_SECONDS", 0.05)
+
+    if op.get_context().as_sql:
+        # Offline (--sql) mode: there is nothing to page through, emit one UPDATE.
+        op.execute(table.update().where(pending).values(**values))
+        return 0
+
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        remaining = bind.execute(
+            sa.select(sa.func.count()).select_from(table).where(pending)
+        ).scalar_one()
+        logger.info("Backfilling %s: %s rows pending", table.name, remaining)
+
+        updated = 0
+        last_key = None
+        sweeps = 1
+        swept = 0
+        started = time.monotonic()
+        while True:
+            query = sa.select(key).where(pending).order_by(key).limit(batch_size)
+            if last_key is not None:
+                query = query.where(key > last_key)
+            keys = bind.execute(query).scalars().all()
+            if not keys:
+                if not swept or sweeps >= max_sweeps:
+                    break
+                # Catch rows inserted behind the keyset position during this sweep.
+                sweeps += 1
+                swept = 0
+                last_key = None
+                continue
+
+            bind.execute(table.update().where(key.in_(keys)).values(**values))
+            updated += len(keys)
+            swept += len(keys)
+            last_key = keys[-1]
+
+            elapsed = time.monotonic() - started
+            logger.info(
+                "Backfilling %s: %s/%s rows (%.0f rows/s)",
+                table.name,
+                updated,
+                remaining,
+                updated / elapsed if elapsed else 0.0,
+            )
+            if pause_seconds:
+                time.sleep(pause_seconds)
+
+        left = bind.execute(
+            sa.select(sa.func.count()).select_from(table).where(pending)
+        ).scalar_one()
+        if left:
+            # Still being written behind us after max_sweeps; finish the stragglers
+            # in one statement rather than report success with rows missing.
+            logger.warning(
+                "Backfilling %s: %s rows still pending after %s sweeps; "
+                "updating them at once",
+                table.name,
+                left,
+                sweeps,
+            )
+            updated += bind.execute(table.update().where(pending).values(**values)).rowcount
+
+    logger.info("Backfilled %s: %s rows updated", table.name, updated)
+    return updated
+
+
+_permission_table = sa.table(
+    "permissions",
+    sa.column("id", postgresql.UUID(as_uuid=True)),
+    sa.column("code", sa.String),
+    sa.column("description", sa.String),
+    sa.column("created_at", sa.DateTime(timezone=True)),
+)
+_role_table = sa.table(
+    "roles",
+    sa.column("id", postgresql.UUID(as_uuid=True)),
+    sa.column("name", sa.String),
+)
+_role_permission_table = sa.table(
+    "role_permissions",
+    sa.column("id", postgresql.UUID(as_uuid=True)),
+    sa.column("role_id", postgresql.UUID(as_uuid=True)),
+    sa.column("permission_id", postgresql.UUID(as_uuid=True)),
+)
+
+
+def add_permission(code: str, description: str) -> None:
+    permission_id = uuid.uuid4()
+    op.bulk_insert(
+        _permission_table,
+        [
+            {
+                "id": permission_id,
+                "code": code,
+                "description": description,
+                "created_at": datetime.utcnow(),
+            }
+        ],
+    )
+
+    # Existing tenants' Admin roles were seeded with every permission; keep that true.
+    admin_role_ids = op.get_bind().execute(
+        sa.select(_role_table.c.id).where(_role_table.c.name == "Admin")
+    ).scalars().all()
+    if admin_role_ids:
+        op.bulk_insert(
+            _role_permission_table,
+            [
+                {"id": uuid.uuid4(), "role_id": role_id, "permission_id": permission_id}
+                for role_id in admin_role_ids
+            ],
+        )
+
+
+def remove_permission(code: str) -> None:
+    permission_ids = op.get_bind().execute(
+        sa.select(_permission_table.c.id).where(_permission_table.c.code == code)
+    ).scalars().all()
+    if permission_ids:
+        op.execute(
+            _role_permission_table.delete().where(
+                _role_permission_table.c.permission_id.in_(permission_ids)
+            )
+        )
+    op.execute(_permission_table.delete().where(_permission_table.c.code == code))
@@ -2,9 +2,7 @@ import os
 from datetime import datetime, timedelta, timezone
 
 from jose import jwt
-from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 JWT_ALGORITHM = "HS256"
 
 
@@ -19,15 +17,10 @@ def _get_jwt_secret() -> str:
     return secret
 
 
-def hash_password(password: str) -> str:
+def check_password_length(password: str) -> None:
     # bcrypt supports max 72 BYTES (not characters)
     if len(password.encode("utf-8")) > 72:
         raise PasswordTooLongError("Password too long (max 72 characters).")
-    return pwd_context.hash(password)
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
 
 
 def create_access_token(subject: str, tenant_id: str, expires_in_hours: int = 24) -> str:
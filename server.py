@@ -0,0 +1,119 @@
+"""
+Pre-forked production server: a gunicorn master with N uvicorn workers.
+
+    python3 server.py                       # $PORT (default 8000), WEB_CONCURRENCY workers
+    python3 server.py --workers 4 --bind 127.0.0.1:8000
+
+The app and the permission catalogue are loaded once in the master before forking,
+so workers share them copy-on-write. Each worker disposes the inherited SQLAlchemy
+pool after fork and opens its own connections.
+
+Signals (sent to the master):
+  HUP   graceful restart of all workers
+  TERM  graceful shutdown (waits up to GRACEFUL_TIMEOUT seconds)
+  TTIN / TTOU  add / remove one worker
+"""
+
+import argparse
+import gc
+import logging
+import os
+
+from gunicorn.app.base import BaseApplication
+
+from settings import env_int
+
+logger = logging.getLogger("skylynx-api")
+
+
+def default_workers() -> int:
+    return env_int("WEB_CONCURRENCY", 0) or os.cpu_count() or 1
+
+
+def _post_fork(server, worker) -> None:
+    from app.services.admission import admission_controller
+    from app.services.password_hashing import password_timings
+    from app.services.statements import statement_cache_stats
+    from app.services.tracing import trace_export_stats
+    from app.services.worker_stats import worker_stats
+    from db import engine
+
+    # Connections inherited from the master must not be shared across processes;
+    # close=False leaves the parent's sockets alone and just drops them here.
+    engine.dispose(close=False)
+    # Per-process metrics start from zero rather than the master's preload and
+    # calibration samples (pool waits, statement cache misses, hash timings,
+    # exported traces).
+    worker_stats.reset()
+    admission_controller.reset()
+    password_timings.reset()
+    statement_cache_stats.reset()
+    trace_export_stats.reset()
+
+
+def _worker_exit(server, worker) -> None:
+    from app.services.worker_stats import worker_stats
+
+    worker_stats.remove()
+
+
+class SkylynxServer(BaseApplication):
+    def __init__(self, options: dict) -> None:
+        self.options = options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from app.services.password_hashing import configure_password_hashing
+        from app.services.permission_catalog import preload_permission_catalog
+        from main import app
+
+        # Calibrate once here rather than in every worker at the same time, where
+        # they would compete for the CPUs being measured.
+        configure_password_hashing()
+
+        try:
+            count = preload_permission_catalog()
+            logger.info("Preloaded %s permissions before forking workers", count)
+        except Exception as exc:
+            # Workers fall back to loading the catalogue lazily on first use.
+            logger.warning("Permission catalogue preload failed: %s", exc)
+
+        # Move everything allocated so far out of the GC's reach so collections in
+        # the workers don't touch (and un-share) those pages.
+        gc.collect()
+        gc.freeze()
+        return app
+
+
+def build_options(workers: int, bind: str) -> dict:
+    return {
+        "bind": bind,
+        "workers": workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": True,
+        "timeout": env_int("WORKER_TIMEOUT", 60),
+        "graceful_timeout": env_int("GRACEFUL_TIMEOUT", 30),
+        "keepalive": env_int("KEEPALIVE", 5),
+        "max_requests": env_int("MAX_REQUESTS", 0),
+        "max_requests_jitter": env_int("MAX_REQUESTS_JITTER", 0),
+        "accesslog": "-" if os.getenv("ACCESS_LOG", "").lower() in {"1", "true"} else None,
+        "post_fork": _post_fork,
+        "worker_exit": _worker_exit,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the Skylynx API with pre-forked workers.")
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--bind", default=f"0.0.0.0:{os.getenv('PORT', '8000')}")
+    args = parser.parse_args()
+
+    SkylynxServer(build_options(max(1, args.workers), args.bind)).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+Numeric settings read from environment variables.
+
+Unset, blank or unparsable values fall back to the default; parsed values are
+clamped to `minimum`, so a stray "-1" can't turn a pool size or interval negative.
+"""
+
+import os
+
+
+def env_int(name: str, default: int, minimum: int = 0) -> int:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return max(minimum, int(raw))
+    except ValueError:
+        return default
+
+
+def env_float(name: str, default: float, minimum: float = 0.0) -> float:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return max(minimum, float(raw))
+    except ValueError:
+        return default